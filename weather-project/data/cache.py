@@ -0,0 +1,176 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_city(city):
+    """Normalize a city name so "New York " and "new  york" share a cache key."""
+    return " ".join(str(city).split()).casefold()
+
+
+class TTLCache:
+    """Bounded in-memory cache with LRU eviction and a time-to-live per entry.
+
+    Expiry times are stored as wall-clock timestamps so entries can be saved
+    to disk and still expire correctly after a restart. With stale_ttl, an
+    expired value is kept that much longer so lookup() can serve it while
+    the caller refreshes it (stale-while-revalidate).
+
+    Args:
+        max_size (int): Most entries kept
+        ttl (float): Default seconds an entry stays fresh
+        persist_path (str): JSON file the cache is saved to and loaded from
+        stale_ttl (float): Seconds past expiry an entry can still be served stale
+        serialize (callable): Turns a value into something JSON can store
+        deserialize (callable): Turns a stored value back into the original
+    """
+
+    def __init__(self, max_size=128, ttl=600, persist_path=None, stale_ttl=0,
+                 serialize=None, deserialize=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self.stale_ttl = stale_ttl
+        self.serialize = serialize
+        self.deserialize = deserialize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # One writer at a time, so the newest snapshot lands last
+
+        if persist_path:
+            self.load()
+
+    def get(self, key, default=None):
+        """Return a fresh cached value, or default on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= time.time():
+                if expires_at + self.stale_ttl <= time.time():
+                    del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def lookup(self, key):
+        """Return (value, fresh) including stale values, or (None, False) on a miss.
+
+        A stale value (expired less than stale_ttl ago) counts as a hit,
+        since the caller serves it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.time()
+            if entry is None or entry[0] + self.stale_ttl <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None, False
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[0] > now
+
+    def set(self, key, value, ttl=None, expires_at=None):
+        """Store a value, evicting the least recently used entry when full.
+
+        Args:
+            ttl (float): Seconds the value stays fresh, defaults to self.ttl
+            expires_at (float): Wall-clock expiry time, instead of a ttl
+        """
+        if expires_at is None:
+            expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        if self.persist_path:
+            self.save()
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > time.time()
+
+    def stats(self):
+        """Return hit/miss counters for checking how much the cache saves."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._entries),
+            "max_size": self.max_size
+        }
+
+    def save(self):
+        """Write unexpired entries to persist_path (oldest first, to keep LRU order)."""
+        with self._save_lock:
+            now = time.time()
+            with self._lock:
+                items = [[key, expires_at, self.serialize(value) if self.serialize else value]
+                         for key, (expires_at, value) in self._entries.items()
+                         if expires_at + self.stale_ttl > now]
+
+            tmp_path = None
+            try:
+                directory = os.path.dirname(self.persist_path) or "."
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.persist_path) + ".",
+                                                suffix=".tmp")
+                with os.fdopen(fd, "w") as f:
+                    json.dump(items, f)
+                os.replace(tmp_path, self.persist_path)  # Atomic swap so a crash never leaves half a file
+            except (OSError, TypeError) as e:
+                print(f"Error saving cache to {self.persist_path}: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def load(self):
+        """Load unexpired entries from persist_path, if it exists."""
+        if not os.path.exists(self.persist_path):
+            return
+
+        try:
+            with open(self.persist_path, "r") as f:
+                items = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Ignoring unreadable cache file {self.persist_path}: {e}")
+            return
+
+        now = time.time()
+        with self._lock:
+            for key, expires_at, value in items:
+                if expires_at + self.stale_ttl > now:
+                    try:
+                        self._entries[key] = (expires_at, self.deserialize(value) if self.deserialize else value)
+                    except (KeyError, TypeError, ValueError) as e:
+                        print(f"Skipping unreadable cache entry {key}: {e}")
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
@@ -0,0 +1,243 @@
+import gzip
+import json
+import os
+import threading
+from bisect import bisect_left
+from typing import NamedTuple
+from data.cache import normalize_city
+from data.records import RECORD_VERSION
+
+
+def city_key(text):
+    """Normalize a city query so "Paris, FR", "paris,fr" and " PARIS ,fr" share a key."""
+    return ",".join(part for part in (normalize_city(part) for part in str(text).split(",")) if part)
+
+
+class City(NamedTuple):
+    """A city as OpenWeatherMap identifies it."""
+    id: int
+    name: str
+    country: str = None
+    lat: float = None
+    lon: float = None
+
+    @property
+    def cache_key(self):
+        """Response cache key shared by every spelling that resolves to this city."""
+        if self.id is not None:
+            return f"id:{self.id}"
+        return f"coord:{self.lat:.4f},{self.lon:.4f}"
+
+    @property
+    def label(self):
+        """Name shown in suggestions, e.g. "Paris, FR"."""
+        return f"{self.name}, {self.country}" if self.country else self.name
+
+    def query_params(self):
+        """Request parameters that select this city without server-side geocoding."""
+        if self.id is not None:
+            return {"id": self.id}
+        return {"lat": self.lat, "lon": self.lon}
+
+
+def city_from_response(data):
+    """Return the City a current-weather or forecast response is for, or None."""
+    info = data.get('city', data)  # Forecast responses nest the city
+    coord = info.get('coord') or {}
+    city_id = info.get('id')
+    if not info.get('name') or (city_id is None and coord.get('lat') is None):
+        return None
+    country = info.get('country') or (info.get('sys') or {}).get('country')
+    return City(city_id, info['name'], country or None, coord.get('lat'), coord.get('lon'))
+
+
+def city_from_entry(entry):
+    """Return the City a history entry (compact or old-style) was resolved to, or None."""
+    if entry.get('v', 1) < RECORD_VERSION:
+        return city_from_response(entry.get('data') or {})
+    if not entry.get('name') or (entry.get('id') is None and entry.get('lat') is None):
+        return None
+    return City(entry.get('id'), entry['name'], entry.get('country'), entry.get('lat'), entry.get('lon'))
+
+
+def read_city_list(path):
+    """Yield Cities from an OpenWeatherMap city.list.json (optionally gzipped)."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        items = json.load(f)
+    for item in items:
+        city = city_from_response(item)
+        if city is not None:
+            yield city
+
+
+class PrefixIndex:
+    """City names kept sorted by key so prefix lookups are a binary search.
+
+    complete() bisects to the first key starting with the prefix and reads
+    forward, so a lookup costs O(log n + limit) however many names there
+    are. Names are added one at a time with an ordered insert, or in bulk
+    with update() (one sort).
+    """
+
+    def __init__(self):
+        self._keys = []    # city_key of each name, sorted
+        self._labels = []  # Name to show, same order as _keys
+        self._lock = threading.Lock()
+
+    def add(self, label):
+        """Add one name (a name with the same key is kept as it is)."""
+        key = city_key(label)
+        if not key:
+            return
+        with self._lock:
+            i = bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                return
+            self._keys.insert(i, key)
+            self._labels.insert(i, label)
+
+    def update(self, labels):
+        """Add many names at once."""
+        pairs = {}
+        for label in labels:
+            key = city_key(label)
+            if key:
+                pairs.setdefault(key, label)
+        items = sorted(pairs.items())  # Sorted outside the lock so complete() isn't held up
+        with self._lock:
+            if self._keys:
+                pairs.update(zip(self._keys, self._labels))  # Names already indexed keep their label
+                items = sorted(pairs.items())
+            self._keys = [key for key, _ in items]
+            self._labels = [label for _, label in items]
+
+    def complete(self, prefix, limit=10):
+        """Return up to limit names whose key starts with prefix's, in key order."""
+        key = city_key(prefix)
+        if not key:
+            return []
+        with self._lock:
+            keys = self._keys
+            i = bisect_left(keys, key)
+            end = min(i + limit, len(keys))
+            matches = []
+            while i < end and keys[i].startswith(key):
+                matches.append(self._labels[i])
+                i += 1
+            return matches
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class CityIndex:
+    """Resolves what the user types to a known city, so requests can use its id.
+
+    Built on first use from the saved history (each lookup stores the id,
+    name, country and coordinates OpenWeatherMap resolved it to) and from an
+    optional bundled city list, then kept up to date with learn() as new
+    responses arrive. What a user typed before resolves to the city it got
+    last time; otherwise a city's name or "name, country" resolves to it
+    unless several known cities share that name. Every known city's name
+    is also kept in a PrefixIndex for type-ahead suggestions (complete()).
+
+    Args:
+        entries (callable): Returns the history entries to build from
+        city_list_path (str): OpenWeatherMap city.list.json(.gz) to load, if it exists
+    """
+
+    def __init__(self, entries=None, city_list_path=None):
+        self.entries = entries
+        self.city_list_path = city_list_path
+        self._cities = {}   # cache_key -> City
+        self._aliases = {}  # city_key -> cache_key, or None when the name is ambiguous
+        self._typed = set()  # Keys that were typed and resolved by the API, never ambiguous
+        self.names = PrefixIndex()
+        self._built = False
+        self._lock = threading.RLock()
+        self._build_thread = None
+
+    def _ensure_built(self):
+        with self._lock:
+            if self._built:
+                return
+            self._built = True
+            if self.city_list_path and os.path.exists(self.city_list_path):
+                try:
+                    for city in read_city_list(self.city_list_path):
+                        self.add(city, index_name=False)
+                except (OSError, ValueError) as e:
+                    print(f"Ignoring unreadable city list {self.city_list_path}: {e}")
+            if self.entries is not None:
+                for entry in self.entries():
+                    city = city_from_entry(entry)
+                    if city is not None:
+                        self.add(city, entry.get('city'), index_name=False)
+            # One sort for everything loaded instead of an ordered insert per city
+            self.names.update(city.label for city in self._cities.values())
+
+    def build_in_background(self):
+        """Build the index on a background thread so startup doesn't wait for it."""
+        if self._build_thread is not None and self._build_thread.is_alive():
+            return self._build_thread
+
+        def worker():
+            try:
+                self._ensure_built()
+            except Exception as e:
+                print(f"Could not build the city index: {e}")
+
+        self._build_thread = threading.Thread(target=worker, name="city-index", daemon=True)
+        self._build_thread.start()
+        return self._build_thread
+
+    def _alias(self, key, ref):
+        if not key or key in self._typed:
+            return
+        if key not in self._aliases:
+            self._aliases[key] = ref
+        elif self._aliases[key] != ref:
+            self._aliases[key] = None
+
+    def add(self, city, query=None, index_name=True):
+        """Index a city under its name, "name, country" and the query that resolved to it."""
+        with self._lock:
+            ref = city.cache_key
+            self._cities[ref] = city
+            if index_name:
+                self.names.add(city.label)
+            self._alias(city_key(city.name), ref)
+            if city.country:
+                self._alias(city_key(f"{city.name},{city.country}"), ref)
+            if query:
+                key = city_key(query)
+                self._typed.add(key)
+                self._aliases[key] = ref
+
+    def learn(self, query, data):
+        """Index the city an API response for query is about; returns it (or None)."""
+        city = city_from_response(data)
+        if city is not None:
+            self._ensure_built()  # So a later build doesn't replay older history over this
+            self.add(city, query)
+        return city
+
+    def resolve(self, query):
+        """Return the City query refers to, or None if it's unknown or ambiguous."""
+        self._ensure_built()
+        with self._lock:
+            ref = self._aliases.get(city_key(query))
+            return self._cities.get(ref) if ref else None
+
+    def complete(self, prefix, limit=10):
+        """Suggest known city names starting with prefix, e.g. "Paris, FR" for "par".
+
+        Never waits for the index to be built: until then it suggests only
+        what is already loaded.
+        """
+        return self.names.complete(prefix, limit)
+
+    def __len__(self):
+        self._ensure_built()
+        return len(self._cities)
@@ -0,0 +1,119 @@
+import os
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Connection pool and timeout settings (can be overridden in .env)
+POOL_SIZE = int(os.getenv("httpPoolSize", "10"))
+CONNECT_TIMEOUT = float(os.getenv("httpConnectTimeout", "3.05"))
+READ_TIMEOUT = float(os.getenv("httpReadTimeout", "10"))
+MAX_RETRIES = int(os.getenv("httpRetries", "3"))
+BACKOFF_FACTOR = float(os.getenv("httpBackoff", "0.5"))
+BATCH_CONCURRENCY = int(os.getenv("batchConcurrency", "8"))
+
+# Status codes worth retrying: rate limiting and server-side errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def create_session(pool_size=POOL_SIZE, max_retries=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR):
+    """Build a requests.Session with a keep-alive connection pool and retries."""
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False  # Hand the last response back so callers can report it
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """Return the shared session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def configure(pool_size=POOL_SIZE, max_retries=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR):
+    """Replace the shared session with one using different pool/retry settings."""
+    global _session
+    new_session = create_session(pool_size, max_retries, backoff_factor)
+    with _session_lock:
+        old_session, _session = _session, new_session
+    if old_session is not None:
+        old_session.close()
+
+
+def get(url, params=None, timeout=None):
+    """GET a URL through the shared session.
+
+    Args:
+        url (str): URL to request
+        params (dict): Query string parameters
+        timeout (float or tuple): Overrides the default (connect, read) timeout
+    """
+    if timeout is None:
+        timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+    return get_session().get(url, params=params, timeout=timeout)
+
+
+def close():
+    """Close the shared session and release its pooled connections."""
+    global _session
+    with _session_lock:
+        old_session, _session = _session, None
+    if old_session is not None:
+        old_session.close()
+
+
+def run_batch(func, items, max_workers=BATCH_CONCURRENCY):
+    """Call func(item) for every item with at most max_workers calls in flight.
+
+    Yields (item, result, error) tuples in completion order, so callers can
+    use each result as soon as it arrives. A failure only sets error for its
+    own item and never stops the rest of the batch.
+    """
+    items = iter(items)
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch")
+    pending = {}
+
+    def submit_next():
+        for item in items:
+            pending[executor.submit(func, item)] = item
+            return True
+        return False
+
+    try:
+        # Only max_workers items are submitted at a time, the rest wait their turn
+        for _ in range(max_workers):
+            if not submit_next():
+                break
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                error = future.exception()
+                yield item, (None if error else future.result()), error
+                submit_next()
+    finally:
+        # Stop queued work if the caller stops reading early
+        executor.shutdown(wait=False, cancel_futures=True)
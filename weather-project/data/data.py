@@ -1,9 +1,30 @@
-import requests
+import atexit
 import json
 import os
 import csv
+import io
+import threading
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
+from data import client
+from data.cache import TTLCache, normalize_city
+from data.cities import CityIndex
+from data.history_db import SQLiteHistoryStore
+from data.history_index import HistoryIndex
+from data.history_summary import HistorySummary
+from data import history_segments
+from data.history_writer import HistoryWriter
+from data.exporters import EXPORT_FORMATS, COLUMNS, export_row, write_records
+from data.records import HistoryRecord, compact_record, entry_fields
+
+# orjson parses history lines several times faster when it's installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 # Load environment variables from .env file
 load_dotenv()
@@ -13,76 +34,461 @@ BASE_URL = os.getenv("weatherAPI")
 FORECAST_URL = os.getenv("forecastAPI")
 
 historyFile = os.path.join(os.path.dirname(__file__), "weather_history.txt") #use path to update weather_history.txt later
+cacheFile = os.path.join(os.path.dirname(__file__), "weather_cache.json")
+historyDbFile = os.path.join(os.path.dirname(__file__), "weather_history.db")
+# Optional OpenWeatherMap city list (city.list.json.gz from bulk.openweathermap.org) to resolve names never looked up
+cityListFile = os.getenv("cityListFile", os.path.join(os.path.dirname(__file__), "city.list.json.gz"))
+
+# Where lookups are saved: "jsonl" (weather_history.txt) or "sqlite" (weather_history.db)
+HISTORY_BACKEND = os.getenv("historyBackend", "jsonl").lower()
+# Store the full API response with each lookup (history files get several times bigger)
+HISTORY_KEEP_RAW = os.getenv("historyKeepRaw", "false").lower() in ("1", "true", "yes")
+# Keep a byte-offset index next to weather_history.txt for filtered exports
+HISTORY_INDEX = os.getenv("historyIndex", "true").lower() in ("1", "true", "yes")
+# Close weather_history.txt into a gzipped segment once it reaches this size (0 disables)
+HISTORY_MAX_BYTES = int(os.getenv("historyMaxBytes", str(16 * 1024 * 1024)))
+# Also start a new segment at the beginning of each month
+HISTORY_ROTATE_MONTHLY = os.getenv("historyRotateMonthly", "true").lower() in ("1", "true", "yes")
+# Repeated lookups of a city within this many minutes collapse into one when compacting
+HISTORY_COMPACT_WINDOW = int(os.getenv("historyCompactWindow", "60"))
+# Lookups are queued and written in batches: at most this many seconds apart...
+HISTORY_FLUSH_INTERVAL = float(os.getenv("historyFlushInterval", "1.0"))
+# ...or as soon as this many are waiting
+HISTORY_BATCH_SIZE = int(os.getenv("historyBatchSize", "256"))
+# "batch" fsyncs weather_history.txt after every batch, "none" leaves it to the OS
+HISTORY_FSYNC = os.getenv("historyFsync", "batch").lower()
+
+_history_store = None
+history_index = HistoryIndex(historyFile)
+history_summary = HistorySummary(historyFile, segments=lambda: history_segment_paths())
+_history_lock = threading.Lock()  # Lookups are saved from GUI worker threads
+
+# OpenWeatherMap refreshes current conditions about every 10 minutes
+CACHE_TTL = int(os.getenv("weatherCacheTTL", "600"))
+CACHE_SIZE = int(os.getenv("weatherCacheSize", "128"))
+CACHE_PERSIST = os.getenv("weatherCachePersist", "false").lower() in ("1", "true", "yes")
+
+weather_cache = TTLCache(max_size=CACHE_SIZE, ttl=CACHE_TTL,
+                         persist_path=cacheFile if CACHE_PERSIST else None)
+
+# Resolve typed names to the city ids seen in earlier responses and query by id
+CITY_INDEX = os.getenv("cityIndex", "true").lower() in ("1", "true", "yes")
+city_index = CityIndex(entries=lambda: history_entries(), city_list_path=cityListFile)
+
+
+def resolve_city(city):
+    """Return the known City a typed name refers to (see cities.CityIndex), or None."""
+    return city_index.resolve(city) if CITY_INDEX else None
+
+
+def city_query_params(city, known=None):
+    """Request parameters for a city: its id (or coordinates) when known, else the name."""
+    if known is not None:
+        return known.query_params()
+    return {"q": city}
+
 
+def learn_city(city, data):
+    """Index the city a response for `city` is about; returns it (or None)."""
+    return city_index.learn(city, data) if CITY_INDEX else None
 
-def fetch_current_weather(city):
+
+def fetch_current_weather(city, use_cache=True):
     # print(f"Fetching current weather for {city}...")  # Debug statement
+    known = resolve_city(city)
+    cache_key = known.cache_key if known else normalize_city(city)
+    if use_cache:
+        cached = weather_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
     params = {
-        "q": city,
+        **city_query_params(city, known),
         "appid": API_KEY,
         "units": "imperial"  # Always fetch in Fahrenheit
     }
     print(f"Req parameters: {params}")
-    response = requests.get(BASE_URL, params=params)
+    response = client.get(BASE_URL, params=params)
 
     if response.status_code == 404:
         raise ValueError(f"City '{city}' not found.") # If the city is not found, raise an error
     elif not response.ok:
         raise RuntimeError(f"API error: {response.status_code} - {response.text}")
 
-    return response.json()
+    data = response.json()
+    learned = learn_city(city, data)
+    weather_cache.set(learned.cache_key if learned else cache_key, data)
+    return data
 
-def export_history_to_csv(csv_filename=None, temp_unit="F"):
-    """Export all weather history data to a CSV file."""
-    if csv_filename is None:
+
+def fetch_many_current_weather(cities, max_workers=client.BATCH_CONCURRENCY, use_cache=True):
+    """Fetch current weather for many cities concurrently.
+
+    Args:
+        cities (iterable): City names to look up
+        max_workers (int): Maximum number of requests in flight at once
+        use_cache (bool): Serve fresh cached results without a request
+
+    Yields:
+        (city, data, error) tuples as each lookup completes. error is None on
+        success; a failed city (e.g. a 404) only affects its own tuple.
+    """
+    return client.run_batch(lambda city: fetch_current_weather(city, use_cache=use_cache),
+                            cities, max_workers=max_workers)
+
+
+def get_weather_cache_stats():
+    """Return hit/miss counters for the current-weather cache."""
+    return weather_cache.stats()
+
+
+def get_history_store():
+    """Return the SQLite history store, importing weather_history.txt the first time."""
+    global _history_store
+    if _history_store is None:
+        _history_store = SQLiteHistoryStore(historyDbFile)
+        for path in history_segment_paths() + [historyFile]:
+            _history_store.migrate_jsonl(path)
+    return _history_store
+
+
+def _write_history_batch(entries):
+    """Append a batch of compact records to the history (runs on the writer thread)."""
+    if HISTORY_BACKEND == "sqlite":
+        get_history_store().append_many(entries)
+        print(f"Saved {len(entries)} lookups to {historyDbFile}")
+        return
+
+    lines = [(json.dumps(entry, separators=(",", ":")) + "\n").encode() for entry in entries]
+    with _history_lock:
+        if history_segments.should_rotate(historyFile, HISTORY_MAX_BYTES, HISTORY_ROTATE_MONTHLY):
+            _rotate_locked()
+        with open(historyFile, "ab") as f:
+            start = f.tell()
+            f.write(b"".join(lines))
+            f.flush()
+            if HISTORY_FSYNC == "batch":
+                os.fsync(f.fileno())
+
+        if HISTORY_INDEX:
+            offsets = []
+            offset = start
+            for entry, line in zip(entries, lines):
+                offsets.append((offset, entry['city'], entry['date']))
+                offset += len(line)
+            history_index.record_appends(start, offsets)
+        history_summary.record_appends(start, entries)
+    print(f"Saved {len(entries)} lookups to {historyFile}")
+
+
+history_writer = HistoryWriter(_write_history_batch, HISTORY_FLUSH_INTERVAL, HISTORY_BATCH_SIZE)
+atexit.register(history_writer.close)
+
+
+def save_weather_to_history(city, data, keep_raw=HISTORY_KEEP_RAW):
+    """Queue a lookup to be saved to the history with the current date.
+
+    Returns immediately; the history writer appends it in the background
+    within historyFlushInterval seconds.
+    """
+    current_date = datetime.now().strftime('%Y-%m-%d')
+
+    try:
+        entry = compact_record(city, current_date, data, keep_raw=keep_raw)
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        print(f"Missing required data in entry: {e}")
+        return
+
+    history_writer.submit(entry)
+
+
+def flush_history(timeout=None):
+    """Wait until every queued lookup has been written to the history."""
+    history_writer.flush(timeout)
+
+
+def history_segment_paths():
+    """Return the closed weather_history.txt segments, oldest first."""
+    return [segment.path for segment in history_segments.list_segments(historyFile)]
+
+
+def _rotate_locked():
+    history_summary.sync()
+    segment_path = history_segments.rotate(historyFile)
+    if segment_path:
+        history_summary.rotated()
+        if HISTORY_INDEX:
+            history_index.rebuild()  # The index only covers the (now empty) active file
+    return segment_path
+
+
+def rotate_history(force=True):
+    """Close weather_history.txt into a gzip-compressed segment.
+
+    Args:
+        force (bool): Rotate even if the file is below historyMaxBytes and
+            still holds only this month's lookups
+
+    Returns the new segment path, or None if nothing was rotated.
+    """
+    flush_history()
+    with _history_lock:
+        if force or history_segments.should_rotate(historyFile, HISTORY_MAX_BYTES, HISTORY_ROTATE_MONTHLY):
+            return _rotate_locked()
+    return None
+
+
+def compact_history(window_minutes=HISTORY_COMPACT_WINDOW):
+    """Collapse repeated snapshots of the same city in the closed segments.
+
+    Only the last lookup of each city per window_minutes is kept. The active
+    weather_history.txt is left alone so its index stays valid; rotate it
+    first to include it. Returns the number of lines removed.
+    """
+    flush_history()
+    removed = 0
+    with _history_lock:
+        for segment in history_segments.list_segments(historyFile):
+            before, after = history_segments.compact_segment(segment.path, window_minutes * 60)
+            removed += before - after
+        if removed:
+            history_summary.rebuild()
+    print(f"Compacted history: removed {removed} repeated lookups")
+    return removed
+
+
+def history_exists():
+    """Check whether there is any saved history to read."""
+    flush_history()
+    if HISTORY_BACKEND == "sqlite":
+        return get_history_store().count() > 0
+    return os.path.exists(historyFile) or bool(history_segments.list_segments(historyFile))
+
+
+def _line_prefilter(city_filter=None, date_filter=None):
+    """Build a cheap bytes check that rejects lines which can't match the filters.
+
+    A line passing the check is only a candidate; the parsed record is still
+    filtered exactly. Returns None when there is nothing to check.
+    """
+    checks = []
+    if date_filter:
+        date_bytes = date_filter.encode()
+        checks.append(lambda line: date_bytes in line)
+    # json.dumps escapes non-ASCII, quotes and backslashes, so only plain ASCII can be matched as bytes
+    if city_filter and city_filter.isascii() and '"' not in city_filter and '\\' not in city_filter:
+        city_bytes = city_filter.lower().encode()
+        checks.append(lambda line: city_bytes in line.lower())
+
+    if not checks:
+        return None
+    return lambda line: all(check(line) for check in checks)
+
+
+def _read_lines(path):
+    with open(path, 'rb') as f:
+        yield from f
+
+
+def _read_range(path, start, end):
+    """Yield the lines that start inside the byte range [start, end)."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        position = start
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line
+
+
+def _segment_lines(date_filter=None, start=None, end=None):
+    """Yield the lines of every closed segment that may hold date_filter / the start-end range."""
+    for segment in history_segments.list_segments(historyFile):
+        if segment.may_contain(date_filter, start, end):
+            yield from history_segments.read_segment_lines(segment.path)
+
+
+def history_entries():
+    """Yield every entry of weather_history.txt and its segments as a dict, oldest first."""
+    flush_history()
+    lines = _segment_lines()
+    if os.path.exists(historyFile):
+        lines = chain(lines, _read_lines(historyFile))
+    for line in lines:
+        try:
+            yield _json_loads(line)
+        except ValueError:
+            continue
+
+
+def read_history(city_filter=None, date_filter=None, parse_fields=True, path=None, use_index=HISTORY_INDEX,
+                 cities=None, start=None, end=None):
+    """Stream HistoryRecords from weather_history.txt and its closed segments.
+
+    Rotated segments are read first (oldest first), skipping those whose date
+    range can't contain date_filter or start-end. In the active file, with a filter and
+    the sidecar index enabled, only the indexed matching lines are read.
+    Otherwise lines that can't match city_filter/date_filter are rejected
+    with a byte check before any JSON parsing, so filtered reads only parse
+    candidates.
+
+    Args:
+        city_filter (str): Filter by city name (case-insensitive)
+        date_filter (str): Filter by date (YYYY-MM-DD format)
+        parse_fields (bool): Read the weather fields too; when False only
+            city and date are filled in (enough for summaries)
+        path (str): Read only this file instead of the whole history
+        use_index (bool): Seek to matching lines using the sidecar index
+        cities (iterable): Only these cities (exact, case-insensitive)
+        start (str): Only dates on or after this one (YYYY-MM-DD format)
+        end (str): Only dates on or before this one (YYYY-MM-DD format)
+    """
+    flush_history()
+    filters = dict(cities=cities, start=start, end=end)
+    if path is not None and path != historyFile:
+        return _parse_lines(_read_lines(path), city_filter, date_filter, parse_fields, **filters)
+
+    if not os.path.exists(historyFile):
+        lines = iter(())
+    elif use_index and (city_filter or date_filter or cities is not None or start or end):
+        lines = history_index.read_lines(history_index.lookup(city_filter, date_filter, **filters))
+    else:
+        lines = _read_lines(historyFile)
+    return _parse_lines(chain(_segment_lines(date_filter, start, end), lines),
+                        city_filter, date_filter, parse_fields, **filters)
+
+
+def _parse_lines(lines, city_filter=None, date_filter=None, parse_fields=True, cities=None, start=None, end=None):
+    """Turn raw history lines into HistoryRecords that match the filters."""
+    prefilter = _line_prefilter(city_filter, date_filter)
+    city_needle = city_filter.lower() if city_filter else None
+    city_keys = {str(city).strip().lower() for city in cities} if cities is not None else None
+
+    for line in lines:
+        if prefilter is not None and not prefilter(line):
+            continue
+        try:
+            entry = _json_loads(line)
+            city = entry.get('city', '')
+            date = entry.get('date', '')
+
+            # Apply filters
+            if city_needle and city_needle not in city.lower():
+                continue
+            if date_filter and date != date_filter:
+                continue
+            if city_keys is not None and city.strip().lower() not in city_keys:
+                continue
+            if (start and date < start) or (end and date > end):
+                continue
+
+            if parse_fields:
+                yield HistoryRecord(city, date, *entry_fields(entry))
+            else:
+                yield HistoryRecord(city, date)
+
+        except ValueError:  # json and orjson decode errors are both ValueErrors
+            print(f"Skipping invalid JSON line: {line.decode(errors='replace').strip()}")
+            continue
+        except (KeyError, IndexError) as e:
+            print(f"Missing required data in entry: {e}")
+            continue
+        except Exception as e:
+            print(f"Error processing line: {e}")
+            continue
+
+
+def history_rows(city_filter=None, date_filter=None, cities=None, start=None, end=None):
+    """Yield HistoryRecords from the active history backend.
+
+    Args:
+        city_filter (str): Filter by city name (case-insensitive)
+        date_filter (str): Filter by date (YYYY-MM-DD format)
+        cities (iterable): Only these cities (exact, case-insensitive)
+        start (str): Only dates on or after this one (YYYY-MM-DD format)
+        end (str): Only dates on or before this one (YYYY-MM-DD format)
+    """
+    if HISTORY_BACKEND == "sqlite":
+        flush_history()
+        return iter(get_history_store().query(city_filter, date_filter, cities, start, end))
+    return read_history(city_filter, date_filter, cities=cities, start=start, end=end)
+
+
+def _chunk_ranges(path, chunks):
+    """Split a file into about `chunks` byte ranges that each start at a line boundary."""
+    size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path, 'rb') as f:
+        for i in range(1, chunks):
+            f.seek(max(size * i // chunks, boundaries[-1]))
+            if f.tell() > 0:
+                f.readline()  # Move to the start of the next line
+            position = min(f.tell(), size)
+            if position > boundaries[-1]:
+                boundaries.append(position)
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+
+def _export_chunk(path, start, end, city_filter, date_filter, temp_unit):
+    """Parse and filter one byte range in a worker process, returning (csv_text, row_count).
+
+    Closed segments are gzip-compressed and can't be split, so a segment
+    is passed with start=end=None and read whole.
+    """
+    if start is None:
+        lines = history_segments.read_segment_lines(path)
+    else:
+        lines = _read_range(path, start, end)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    rows = 0
+    for record in _parse_lines(lines, city_filter, date_filter):
+        writer.writerow(export_row(record, temp_unit))
+        rows += 1
+    return buffer.getvalue(), rows
+
+
+def export_history(fmt="csv", filename=None, temp_unit="F", city_filter=None, date_filter=None):
+    """Export weather history data, optionally filtered, in any supported format.
+
+    Args:
+        fmt (str): "csv", "csv.gz", "csv.zst", "ndjson" or "parquet"
+            (zstd needs zstandard, Parquet needs pyarrow)
+        filename (str): Custom filename for the export
+        temp_unit (str): Temperature unit "F" for Fahrenheit or "C" for Celsius
+        city_filter (str): Filter by city name (case-insensitive)
+        date_filter (str): Filter by date (YYYY-MM-DD format)
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'. Choose from: {', '.join(EXPORT_FORMATS)}")
+
+    if filename is None:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        csv_filename = f"weather_history_{timestamp}.csv"
+        filters = []
+        if city_filter:
+            filters.append(f"city_{city_filter}")
+        if date_filter:
+            filters.append(f"date_{date_filter}")
+        filter_str = "_".join(filters) + "_" if filters else ""
+        filename = f"weather_history_{filter_str}{timestamp}{EXPORT_FORMATS[fmt]}"
     
-    if not os.path.exists(historyFile):
+    if not history_exists():
         print("No history file found. Nothing to export.")
         return
     
-    # Define CSV headers - only the fields you need
-    headers = ['name', 'date', 'temp', 'humidity', 'precip', 'condition']
+    export_path = os.path.join(os.path.dirname(__file__), filename)
+    rows_exported = write_records(export_path, history_rows(city_filter, date_filter), fmt, temp_unit)
     
-    csv_path = os.path.join(os.path.dirname(__file__), csv_filename)
-    
-    with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(headers)
-        
-        # Read and process each line from history file
-        with open(historyFile, 'r') as f:
-            for line in f:
-                try:
-                    entry = json.loads(line)
-                    date = entry.get('date', '')
-                    data = entry.get('data', {})
-                    
-                    # Extract only the specific data we need
-                    temp = data['main']['temp']
-                    if temp_unit == "C":
-                        temp = (temp - 32) * 5 / 9
-                    humidity = data['main']['humidity']
-                    precip = data.get('rain', {}).get('1h', 0)
-                    condition = data['weather'][0]['description'].title()
-                    name = data['name']
-                    
-                    row = [name, date, temp, humidity, precip, condition]
-                    writer.writerow(row)
-                    
-                except json.JSONDecodeError:
-                    print(f"Skipping invalid JSON line: {line.strip()}")
-                    continue
-                except (KeyError, IndexError) as e:
-                    print(f"Missing required data in entry: {e}")
-                    continue
-                except Exception as e:
-                    print(f"Error processing line: {e}")
-                    continue
-    
-    print(f"Weather history exported to: {csv_path}")
-    return csv_path
+    print(f"Exported {rows_exported} records to: {export_path}")
+    return export_path
+
+
+def export_history_to_csv(csv_filename=None, temp_unit="F"):
+    """Export all weather history data to a CSV file."""
+    return export_history("csv", csv_filename, temp_unit)
 
 
 def export_filtered_history_to_csv(city_filter=None, date_filter=None, csv_filename=None, temp_unit="F"):
@@ -94,113 +500,109 @@ def export_filtered_history_to_csv(city_filter=None, date_filter=None, csv_filen
         csv_filename (str): Custom filename for the CSV file
         temp_unit (str): Temperature unit "F" for Fahrenheit or "C" for Celsius
     """
+    return export_history("csv", csv_filename, temp_unit, city_filter, date_filter)
+
+
+def export_history_parallel(csv_filename=None, temp_unit="F", city_filter=None, date_filter=None,
+                            workers=None, chunk_size=8 * 1024 * 1024):
+    """Export weather_history.txt to CSV using several processes.
+
+    Each closed segment is one task and the active file is split into
+    newline-aligned byte ranges; tasks are parsed and filtered in a process
+    pool and the results are written in the original line order. Meant for
+    very large histories - small ones are exported in one pass since
+    starting processes would cost more than it saves. With the sqlite
+    backend the export is a plain export_history() call.
+
+    Args:
+        csv_filename (str): Custom filename for the CSV file
+        temp_unit (str): Temperature unit "F" for Fahrenheit or "C" for Celsius
+        city_filter (str): Filter by city name (case-insensitive)
+        date_filter (str): Filter by date (YYYY-MM-DD format)
+        workers (int): Number of processes, defaults to the CPU count
+        chunk_size (int): Target bytes per range
+    """
+    if HISTORY_BACKEND == "sqlite":  # The rows are in the database, not in the text files
+        return export_history("csv", csv_filename, temp_unit, city_filter, date_filter)
+
     if csv_filename is None:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filters = []
-        if city_filter:
-            filters.append(f"city_{city_filter}")
-        if date_filter:
-            filters.append(f"date_{date_filter}")
-        filter_str = "_".join(filters) if filters else "filtered"
-        csv_filename = f"weather_history_{filter_str}_{timestamp}.csv"
-    
-    if not os.path.exists(historyFile):
+        csv_filename = f"weather_history_{timestamp}.csv"
+
+    if not history_exists():
         print("No history file found. Nothing to export.")
         return
-    
-    # Define CSV headers - only the fields you need
-    headers = ['name', 'date', 'temp', 'humidity', 'precip', 'condition']
-    
+
     csv_path = os.path.join(os.path.dirname(__file__), csv_filename)
-    rows_exported = 0
-    
-    with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(headers)
-        
-        # Read and process each line from history file
-        with open(historyFile, 'r') as f:
-            for line in f:
-                try:
-                    entry = json.loads(line)
-                    city = entry.get('city', '')
-                    date = entry.get('date', '')
-                    data = entry.get('data', {})
-                    
-                    # Apply filters
-                    if city_filter and city_filter.lower() not in city.lower():
-                        continue
-                    if date_filter and date != date_filter:
-                        continue
-                    
-                    # Extract only the specific data you need
-                    temp = data['main']['temp']
-                    if temp_unit == "C":
-                        temp = (temp - 32) * 5 / 9
-                    humidity = data['main']['humidity']
-                    precip = data.get('rain', {}).get('1h', 0)
-                    condition = data['weather'][0]['description'].title()
-                    name = data['name']
-                    
-                    row = [name, date, temp, humidity, precip, condition]
-                    writer.writerow(row)
-                    rows_exported += 1
-                    
-                except json.JSONDecodeError:
-                    continue
-                except (KeyError, IndexError) as e:
-                    print(f"Missing required data in entry: {e}")
-                    continue
-                except Exception as e:
-                    print(f"Error processing line: {e}")
-                    continue
-    
+    workers = workers or os.cpu_count() or 1
+    segments = [segment for segment in history_segments.list_segments(historyFile)
+                if segment.may_contain(date_filter)]
+    size = os.path.getsize(historyFile) if os.path.exists(historyFile) else 0
+
+    if workers == 1 or (size <= chunk_size and len(segments) < 2):
+        rows_exported = write_records(
+            csv_path, read_history(city_filter, date_filter, use_index=False), "csv", temp_unit)
+    else:
+        # At least one range per worker, more for big files so the load stays balanced
+        ranges = [(segment.path, None, None) for segment in segments]
+        if size:
+            chunks = max(workers - len(segments), size // chunk_size, 1)
+            ranges += [(historyFile, start, end) for start, end in _chunk_ranges(historyFile, chunks)]
+        rows_exported = 0
+
+        with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
+            csv.writer(csvfile).writerow(COLUMNS)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # map() returns results in submission order, which keeps the file order
+                results = executor.map(_export_chunk,
+                                       [path for path, _, _ in ranges],
+                                       [start for _, start, _ in ranges],
+                                       [end for _, _, end in ranges],
+                                       [city_filter] * len(ranges),
+                                       [date_filter] * len(ranges),
+                                       [temp_unit] * len(ranges))
+                for csv_text, rows in results:
+                    csvfile.write(csv_text)
+                    rows_exported += rows
+
     print(f"Exported {rows_exported} records to: {csv_path}")
     return csv_path
 
 
 def get_search_history_summary():
-    """Get a summary of the search history."""
-    if not os.path.exists(historyFile):
+    """Get a summary of the search history.
+
+    Returns a dict with total_entries, first_seen/last_seen timestamps,
+    per-city {"count", "first_seen", "last_seen"} (spellings of a city
+    counted together) and per-date counts. The totals are
+    kept up to date as lookups are saved, so this doesn't re-read the history.
+    """
+    if not history_exists():
         print("No history file found.")
         return
-    
-    cities = set()
-    dates = set()
-    total_entries = 0
-    
-    with open(historyFile, 'r') as f:
-        for line in f:
-            try:
-                entry = json.loads(line)
-                cities.add(entry.get('city', ''))
-                dates.add(entry.get('date', ''))
-                total_entries += 1
-            except json.JSONDecodeError:
-                continue
 
+    if HISTORY_BACKEND == "sqlite":
+        return get_history_store().summary()
+    return history_summary.get()
 
-def get_search_history_summary():
-    """Get a summary of the search history."""
-    if not os.path.exists(historyFile):
-        print("No history file found.")
-        return
-    
-    cities = set()
-    dates = set()
-    total_entries = 0
-    
-    with open(historyFile, 'r') as f:
-        for line in f:
-            try:
-                entry = json.loads(line)
-                cities.add(entry.get('city', ''))
-                dates.add(entry.get('date', ''))
-                total_entries += 1
-            except json.JSONDecodeError:
-                continue
+
+def rebuild_history_index():
+    """Rebuild the weather_history.txt sidecar index from scratch."""
+    history_index.rebuild()
+
+
+def migrate_history():
+    """One-shot import of weather_history.txt and its segments into the SQLite history store."""
+    flush_history()
+    store = get_history_store()
+    return sum(store.migrate_jsonl(path) for path in history_segment_paths() + [historyFile])
     
 
 if __name__ == "__main__":
     # Print summary of search history
-    get_search_history_summary()
+    summary = get_search_history_summary()
+    if summary:
+        print(f"{summary['total_entries']} lookups of {len(summary['cities'])} cities "
+              f"from {summary['first_seen']} to {summary['last_seen']}")
+        for city, stats in sorted(summary['cities'].items(), key=lambda item: -item[1]['count']):
+            print(f"  {city}: {stats['count']} (last seen {stats['last_seen']})")
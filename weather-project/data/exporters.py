@@ -0,0 +1,133 @@
+import csv
+import gzip
+import io
+import json
+from itertools import islice
+
+# Optional dependencies for the compressed and columnar formats
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Export format -> file extension
+EXPORT_FORMATS = {
+    "csv": ".csv",
+    "csv.gz": ".csv.gz",
+    "csv.zst": ".csv.zst",
+    "ndjson": ".ndjson",
+    "parquet": ".parquet"
+}
+
+COLUMNS = ['name', 'date', 'temp', 'humidity', 'precip', 'condition']
+
+# Rows converted and written per batch
+BATCH_SIZE = 5000
+
+
+def available_formats():
+    """Return the export formats that can be written with the installed packages."""
+    formats = []
+    for fmt in EXPORT_FORMATS:
+        if fmt == "csv.zst" and not ZSTD_AVAILABLE:
+            continue
+        if fmt == "parquet" and not PARQUET_AVAILABLE:
+            continue
+        formats.append(fmt)
+    return formats
+
+
+def export_row(record, temp_unit="F"):
+    """Return the exported values for a HistoryRecord, in COLUMNS order."""
+    temp = record.temp
+    if temp_unit == "C":
+        temp = (temp - 32) * 5 / 9
+    return [record.name, record.date, temp, record.humidity, record.precip, record.condition]
+
+
+def _batches(records, temp_unit, batch_size):
+    records = iter(records)
+    while True:
+        batch = [export_row(record, temp_unit) for record in islice(records, batch_size)]
+        if not batch:
+            return
+        yield batch
+
+
+def _open_text(path, fmt):
+    if fmt == "csv.gz":
+        return gzip.open(path, "wt", newline="", encoding="utf-8")
+    if fmt == "csv.zst":
+        raw = open(path, "wb")
+        stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    return open(path, "w", newline="", encoding="utf-8")
+
+
+def _write_csv(path, records, fmt, temp_unit, batch_size):
+    count = 0
+    with _open_text(path, fmt) as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for batch in _batches(records, temp_unit, batch_size):
+            writer.writerows(batch)
+            count += len(batch)
+    return count
+
+
+def _write_ndjson(path, records, temp_unit, batch_size):
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for batch in _batches(records, temp_unit, batch_size):
+            f.write("".join(json.dumps(dict(zip(COLUMNS, row))) + "\n" for row in batch))
+            count += len(batch)
+    return count
+
+
+def _write_parquet(path, records, temp_unit, batch_size):
+    schema = pa.schema([
+        ("name", pa.string()),
+        ("date", pa.string()),
+        ("temp", pa.float64()),
+        ("humidity", pa.float64()),
+        ("precip", pa.float64()),
+        ("condition", pa.string())
+    ])
+    count = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for batch in _batches(records, temp_unit, batch_size):
+            columns = [list(column) for column in zip(*batch)]
+            writer.write_batch(pa.record_batch(columns, schema=schema))
+            count += len(batch)
+    return count
+
+
+def write_records(path, records, fmt="csv", temp_unit="F", batch_size=BATCH_SIZE):
+    """Write HistoryRecords to path in the given format, returning the row count.
+
+    Args:
+        path (str): Output file
+        records (iterable): HistoryRecords to export
+        fmt (str): One of EXPORT_FORMATS
+        temp_unit (str): Temperature unit "F" for Fahrenheit or "C" for Celsius
+        batch_size (int): Rows converted and written at a time
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'. Choose from: {', '.join(EXPORT_FORMATS)}")
+    if fmt not in available_formats():
+        package = "zstandard" if fmt == "csv.zst" else "pyarrow"
+        raise RuntimeError(f"Export format '{fmt}' needs the {package} package to be installed.")
+
+    if fmt == "ndjson":
+        return _write_ndjson(path, records, temp_unit, batch_size)
+    if fmt == "parquet":
+        return _write_parquet(path, records, temp_unit, batch_size)
+    return _write_csv(path, records, fmt, temp_unit, batch_size)
@@ -0,0 +1,213 @@
+import gzip
+import json
+import os
+import sqlite3
+import threading
+from data.records import HistoryRecord, entry_fields
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    city TEXT NOT NULL,
+    city_key TEXT NOT NULL,
+    date TEXT NOT NULL,
+    name TEXT,
+    temp NUMERIC,
+    humidity NUMERIC,
+    precip NUMERIC,
+    condition TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_history_city ON history (city_key, date);
+CREATE INDEX IF NOT EXISTS idx_history_date ON history (date);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Lines inserted per executemany() while importing a history file
+MIGRATE_BATCH_SIZE = 5000
+
+INSERT_SQL = ("INSERT INTO history (city, city_key, date, name, temp, humidity, precip, condition, data) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+def _record_rows(records):
+    """Yield the table row for each record, skipping those missing the exported fields."""
+    for record in records:
+        try:
+            name, temp, humidity, precip, condition = entry_fields(record)
+        except (KeyError, IndexError, TypeError) as e:
+            print(f"Missing required data in entry: {e}")
+            continue
+        city = record.get('city', '')
+        raw = record.get('data')
+        yield (city, city.strip().lower(), record.get('date', ''), name, temp, humidity,
+               precip, condition, json.dumps(raw) if raw is not None else None)
+
+
+class SQLiteHistoryStore:
+    """Weather history kept in SQLite with indexes on city and date.
+
+    City and date filters are answered from the indexes, so the cost of an
+    export or summary grows with the number of matching rows rather than the
+    size of the whole history.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        # The GUI saves from worker threads, so share one connection behind a lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def append(self, record):
+        """Save one history record (see records.compact_record)."""
+        self.append_many([record])
+
+    def append_many(self, records):
+        """Save several history records in one transaction.
+
+        Accepts compact records and old-style {"city", "date", "data"} entries.
+        The raw API payload is only stored when the record carries one.
+        Records that are missing the exported fields are skipped.
+        """
+        rows = list(_record_rows(records))
+        with self._lock:
+            self._conn.executemany(INSERT_SQL, rows)
+            self._conn.commit()
+        return len(rows)
+
+    def _matching_city_keys(self, city_filter):
+        """Return the stored city keys containing city_filter (case-insensitive).
+
+        Only distinct keys are scanned (straight from the city index), then the
+        matching rows are fetched with index lookups.
+        """
+        needle = city_filter.strip().lower()
+        with self._lock:
+            keys = [row[0] for row in self._conn.execute("SELECT DISTINCT city_key FROM history")]
+        return [key for key in keys if needle in key]
+
+    def query(self, city_filter=None, date_filter=None, cities=None, start=None, end=None):
+        """Return matching HistoryRecords in save order.
+
+        Args:
+            city_filter (str): Only cities containing this text (case-insensitive)
+            date_filter (str): Only this date (YYYY-MM-DD format)
+            cities (iterable): Only these cities (exact, case-insensitive)
+            start (str): Only dates on or after this one (YYYY-MM-DD format)
+            end (str): Only dates on or before this one (YYYY-MM-DD format)
+        """
+        clauses = []
+        params = []
+        if cities is not None:
+            keys = sorted({str(city).strip().lower() for city in cities})
+            if not keys:
+                return []
+            clauses.append(f"city_key IN ({', '.join('?' * len(keys))})")
+            params.extend(keys)
+        if city_filter:
+            keys = self._matching_city_keys(city_filter)
+            if not keys:
+                return []
+            clauses.append(f"city_key IN ({', '.join('?' * len(keys))})")
+            params.extend(keys)
+        if date_filter:
+            clauses.append("date = ?")
+            params.append(date_filter)
+        if start:
+            clauses.append("date >= ?")
+            params.append(start)
+        if end:
+            clauses.append("date <= ?")
+            params.append(end)
+
+        sql = "SELECT city, date, name, temp, humidity, precip, condition FROM history"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id"
+
+        with self._lock:
+            return [HistoryRecord._make(row) for row in self._conn.execute(sql, params)]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def summary(self):
+        """Return per-city and per-date counts, first/last seen dates and the total.
+
+        Spellings of a city that differ only in case are counted together
+        under the spelling saved first. Rows don't keep the observation time,
+        so first/last seen are lookup dates.
+        """
+        with self._lock:
+            city_rows = self._conn.execute(
+                "SELECT MIN(id), COUNT(*), MIN(date), MAX(date) FROM history GROUP BY city_key").fetchall()
+            names = dict(self._conn.execute(
+                "SELECT id, city FROM history WHERE id IN (SELECT MIN(id) FROM history GROUP BY city_key)"))
+            date_rows = self._conn.execute("SELECT date, COUNT(*) FROM history GROUP BY date").fetchall()
+
+        cities = {names[first_id]: {"count": count, "first_seen": first, "last_seen": last}
+                  for first_id, count, first, last in city_rows}
+        dates = dict(date_rows)
+        return {
+            "total_entries": sum(dates.values()),
+            "first_seen": min(dates) if dates else None,
+            "last_seen": max(dates) if dates else None,
+            "cities": cities,
+            "dates": dates
+        }
+
+    def migrate_jsonl(self, jsonl_path):
+        """Import an existing weather_history.txt file (or closed segment) once.
+
+        The rows and the record of the import are committed in one
+        transaction under the store lock, so a crash part way through (or a
+        second caller) can never import the file twice. The file is streamed
+        in batches rather than read into memory. Returns the number of rows
+        imported.
+        """
+        source = os.path.abspath(jsonl_path)
+        opener = gzip.open if jsonl_path.endswith(".gz") else open  # Rotated segments are gzipped
+        with self._lock:
+            done = self._conn.execute("SELECT value FROM meta WHERE key = ?",
+                                      (f"migrated:{source}",)).fetchone()
+            if done or not os.path.exists(jsonl_path):
+                return 0
+
+            imported = 0
+            try:
+                with opener(jsonl_path, 'rt') as f:
+                    batch = []
+                    for line in f:
+                        try:
+                            batch.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            continue
+                        if len(batch) >= MIGRATE_BATCH_SIZE:
+                            imported += self._insert(batch)
+                            batch = []
+                    imported += self._insert(batch)
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                   (f"migrated:{source}", str(imported)))
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return imported
+
+    def _insert(self, records):
+        """Insert records without committing (the caller holds the lock and commits)."""
+        rows = list(_record_rows(records))
+        self._conn.executemany(INSERT_SQL, rows)
+        return len(rows)
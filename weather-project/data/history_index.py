@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+
+# orjson parses history lines several times faster when it's installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+class HistoryIndex:
+    """Sidecar index mapping (city, date) to byte offsets in weather_history.txt.
+
+    The index is two files next to the history file:
+    - <history>.idx: one "offset<TAB>city<TAB>date" line per history line,
+      appended to as lookups are saved
+    - <history>.idx.meta: the history file size and mtime the index covers
+
+    When the history file no longer matches the meta (another writer, a
+    crash between writes), only the unindexed tail is read. If the file
+    shrank or was rewritten in place, the index is rebuilt from scratch.
+
+    The history writer thread appends to the index while exports look it up
+    from other threads, so both go through one lock.
+    """
+
+    def __init__(self, history_path, index_path=None):
+        self.history_path = history_path
+        self.index_path = index_path or history_path + ".idx"
+        self.meta_path = self.index_path + ".meta"
+        self._offsets = None  # city_key -> {date: [offsets]}, loaded on first lookup
+        self._indexed = None  # (size, mtime) of the history file the index covers
+        self._lock = threading.Lock()
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_path, "r") as f:
+                meta = json.load(f)
+            return meta["size"], meta["mtime"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_meta(self, size, mtime):
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"size": size, "mtime": mtime}, f)
+        os.replace(tmp_path, self.meta_path)
+        self._indexed = (size, mtime)
+
+    def _file_state(self):
+        stat = os.stat(self.history_path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def _add_offset(self, offset, city, date):
+        if self._offsets is not None:
+            self._offsets.setdefault(city.strip().lower(), {}).setdefault(date, []).append(offset)
+
+    def _index_lines(self, start):
+        """Index history lines from byte offset start to the end of the file."""
+        entries = []
+        with open(self.history_path, "rb") as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Half-written last line - index it next time
+                try:
+                    entry = _json_loads(line)
+                    city = str(entry.get("city", "")).replace("\t", " ")
+                    date = str(entry.get("date", ""))
+                    entries.append(f"{offset}\t{city}\t{date}\n")
+                    self._add_offset(offset, city, date)
+                except ValueError:
+                    pass  # Invalid lines are never exported, so leave them out
+                offset += len(line)
+
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.writelines(entries)
+        return offset
+
+    def rebuild(self):
+        """Index the whole history file from scratch."""
+        with self._lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
+        self._offsets = {}
+        if not os.path.exists(self.history_path):
+            self._write_meta(0, 0)
+            return
+
+        size, mtime = self._file_state()
+        indexed_to = self._index_lines(0)
+        self._write_meta(indexed_to, mtime if indexed_to == size else 0)
+
+    def refresh(self):
+        """Bring the index up to date with the history file, repairing it if stale."""
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        if not os.path.exists(self.history_path):
+            self._offsets = {}
+            return
+
+        meta = self._read_meta()
+        size, mtime = self._file_state()
+        if meta is None or not os.path.exists(self.index_path) or meta[0] > size or \
+                (meta[0] == size and meta[1] != mtime):
+            print(f"Rebuilding history index {self.index_path}")
+            self._rebuild()
+            return
+
+        if self._offsets is None:
+            self._load()
+        if meta[0] < size:
+            # Only the tail written since the index was last updated needs reading
+            indexed_to = self._index_lines(meta[0])
+            self._write_meta(indexed_to, mtime if indexed_to == size else 0)
+
+    def _load(self):
+        self._offsets = {}
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) == 3:
+                    self._add_offset(int(parts[0]), parts[1], parts[2])
+
+    def record_append(self, offset, city, date):
+        """Index one line that was just appended at offset."""
+        self.record_appends(offset, [(offset, city, date)])
+
+    def record_appends(self, start, lines):
+        """Index lines that were just appended as one write starting at byte start.
+
+        Args:
+            start (int): History file size before the write
+            lines (list): (offset, city, date) for each appended line
+
+        Only updates the index when it was current before the write;
+        otherwise the next refresh() picks the lines up from the tail. The
+        meta is checked under the lock, so lines a concurrent refresh()
+        already indexed from the tail aren't indexed twice.
+        """
+        with self._lock:
+            meta = self._read_meta()
+            if meta is None or meta[0] != start:
+                return
+
+            rows = []
+            for offset, city, date in lines:
+                city = str(city).replace("\t", " ")
+                rows.append(f"{offset}\t{city}\t{date}\n")
+                self._add_offset(offset, city, date)
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.writelines(rows)
+            size, mtime = self._file_state()
+            self._write_meta(size, mtime)
+
+    def lookup(self, city_filter=None, date_filter=None, cities=None, start=None, end=None):
+        """Return sorted byte offsets of lines matching the filters.
+
+        Args:
+            city_filter (str): Cities containing this text (case-insensitive)
+            date_filter (str): Exact date (YYYY-MM-DD format)
+            cities (iterable): Only these cities (exact, case-insensitive)
+            start (str): Dates on or after this one (YYYY-MM-DD format)
+            end (str): Dates on or before this one (YYYY-MM-DD format)
+        """
+        needle = city_filter.strip().lower() if city_filter else None
+        city_keys = {str(city).strip().lower() for city in cities} if cities is not None else None
+
+        offsets = []
+        with self._lock:
+            self._refresh()
+            for city_key, dates in self._offsets.items():
+                if needle and needle not in city_key:
+                    continue
+                if city_keys is not None and city_key not in city_keys:
+                    continue
+                if date_filter:
+                    offsets.extend(dates.get(date_filter, ()))
+                else:
+                    for date, date_offsets in dates.items():
+                        if (start and date < start) or (end and date > end):
+                            continue
+                        offsets.extend(date_offsets)
+        offsets.sort()
+        return offsets
+
+    def read_lines(self, offsets):
+        """Yield the history lines starting at each offset."""
+        with open(self.history_path, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                yield f.readline()
@@ -0,0 +1,178 @@
+import glob
+import gzip
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+from typing import NamedTuple
+
+# orjson parses history lines several times faster when it's installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Closed segments are named <history>.<first date>_<last date>[.n].txt.gz
+SEGMENT_RE = re.compile(r"\.(\d{4}-\d{2}-\d{2})_(\d{4}-\d{2}-\d{2})(?:\.(\d+))?\.txt\.gz$")
+
+
+class Segment(NamedTuple):
+    """A closed, gzip-compressed piece of the history and the dates it covers."""
+    path: str
+    first_date: str
+    last_date: str
+    number: int = 0
+
+    def may_contain(self, date_filter=None, start=None, end=None):
+        """Whether this segment can hold rows for the date filter / range (YYYY-MM-DD)."""
+        if date_filter and not (self.first_date <= date_filter <= self.last_date):
+            return False
+        if start and self.last_date < start:
+            return False
+        if end and self.first_date > end:
+            return False
+        return True
+
+
+def _segment_base(history_path):
+    root, _ = os.path.splitext(history_path)
+    return root
+
+
+def list_segments(history_path):
+    """Return the closed segments of a history file, oldest first."""
+    segments = []
+    for path in glob.glob(glob.escape(_segment_base(history_path)) + ".*_*.txt.gz"):
+        match = SEGMENT_RE.search(path)
+        if match:
+            segments.append(Segment(path, match.group(1), match.group(2), int(match.group(3) or 0)))
+    segments.sort(key=lambda segment: (segment.first_date, segment.last_date, segment.number))
+    return segments
+
+
+def read_segment_lines(path):
+    """Yield the raw lines of a closed segment."""
+    with gzip.open(path, "rb") as f:
+        yield from f
+
+
+def _date_range(history_path):
+    """Return the (first, last) lookup dates in a history file."""
+    first = last = None
+    with open(history_path, "rb") as f:
+        for line in f:
+            try:
+                date = _json_loads(line).get("date")
+            except ValueError:
+                continue
+            if date:
+                first = date if first is None else min(first, date)
+                last = date if last is None else max(last, date)
+    today = datetime.now().strftime('%Y-%m-%d')
+    return first or today, last or today
+
+
+def _first_date(history_path):
+    with open(history_path, "rb") as f:
+        for line in f:
+            try:
+                date = _json_loads(line).get("date")
+            except ValueError:
+                continue
+            if date:
+                return date
+    return None
+
+
+def should_rotate(history_path, max_bytes=None, monthly=False, today=None):
+    """Check whether the active history file is due to be closed into a segment.
+
+    Args:
+        history_path (str): Active history file
+        max_bytes (int): Rotate once the file reaches this size
+        monthly (bool): Rotate when the file holds lookups from an earlier month
+        today (str): Current date (YYYY-MM-DD), for testing
+    """
+    try:
+        size = os.path.getsize(history_path)
+    except OSError:
+        return False
+    if size == 0:
+        return False
+    if max_bytes and size >= max_bytes:
+        return True
+    if monthly:
+        first_date = _first_date(history_path)
+        today = today or datetime.now().strftime('%Y-%m-%d')
+        return first_date is not None and first_date[:7] < today[:7]
+    return False
+
+
+def _segment_path(history_path, first_date, last_date):
+    base = f"{_segment_base(history_path)}.{first_date}_{last_date}"
+    path = f"{base}.txt.gz"
+    number = 0
+    while os.path.exists(path):
+        number += 1
+        path = f"{base}.{number}.txt.gz"
+    return path
+
+
+def rotate(history_path):
+    """Close the active history file into a gzip-compressed segment.
+
+    The active file is removed afterwards, so the next lookup starts a new
+    one. Returns the segment path, or None if there was nothing to rotate.
+    """
+    if not os.path.exists(history_path) or os.path.getsize(history_path) == 0:
+        return None
+
+    first_date, last_date = _date_range(history_path)
+    segment_path = _segment_path(history_path, first_date, last_date)
+    tmp_path = segment_path + ".tmp"
+    with open(history_path, "rb") as src, gzip.open(tmp_path, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.replace(tmp_path, segment_path)
+    os.remove(history_path)
+    print(f"Rotated {history_path} into {segment_path}")
+    return segment_path
+
+
+def _snapshot_time(entry):
+    """Observation time of a history entry in seconds, falling back to its date."""
+    ts = entry.get("ts")
+    if ts is None and isinstance(entry.get("data"), dict):
+        ts = entry["data"].get("dt")
+    if ts is not None:
+        return ts
+    try:
+        return datetime.strptime(entry.get("date", ""), "%Y-%m-%d").timestamp()
+    except ValueError:
+        return 0
+
+
+def compact_segment(path, window_seconds=3600):
+    """Collapse repeated snapshots of the same city within a time window.
+
+    Only the last snapshot of each city per window is kept, in the original
+    order. Returns (lines_before, lines_after).
+    """
+    lines = list(read_segment_lines(path))
+    keep = {}  # (city, window) -> index of the last line seen for it
+    for i, line in enumerate(lines):
+        try:
+            entry = _json_loads(line)
+        except ValueError:
+            continue  # Drop lines that can't be read anyway
+        city = str(entry.get("city", "")).strip().lower()
+        keep[(city, int(_snapshot_time(entry) // window_seconds))] = i
+
+    kept = [lines[i] for i in sorted(keep.values())]
+    if len(kept) < len(lines):
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, "wb") as f:
+            f.writelines(kept)
+        os.replace(tmp_path, path)
+    return len(lines), len(kept)
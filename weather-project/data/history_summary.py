@@ -0,0 +1,213 @@
+import gzip
+import json
+import os
+import threading
+from datetime import datetime
+from data.cache import normalize_city
+
+# orjson parses history lines several times faster when it's installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Bump when the saved state changes shape, so old sidecars are rebuilt
+SUMMARY_VERSION = 2
+
+
+def seen_time(entry):
+    """When a history entry was recorded, as an ISO timestamp (sorts as a string).
+
+    Uses the observation time saved with the lookup ("ts", or "dt" in old
+    raw entries), falling back to the lookup date when there is none.
+    """
+    ts = entry.get('ts') or entry.get('timestamp') or (entry.get('data') or {}).get('dt')
+    if isinstance(ts, (int, float)):
+        return datetime.fromtimestamp(ts).isoformat(timespec='seconds')
+    if isinstance(ts, str) and ts:
+        return ts
+    return str(entry.get('date', ''))
+
+
+class HistorySummary:
+    """Running totals for weather_history.txt, kept in a sidecar JSON file.
+
+    The aggregate (per-city and per-date counts, first/last seen timestamps
+    and the overall total) is updated as each lookup is saved and stores the
+    history file size/mtime it covers, so reading it never rescans the
+    history. If the history changed behind its back, only the new tail is
+    read; if the file shrank or was rewritten, the aggregate is rebuilt.
+
+    Closed (rotated) segments stay counted: after a rotation the size/mtime
+    are reset to the new, empty active file, and a rebuild re-reads the
+    segments returned by the segments callable before the active file.
+
+    Cities are counted under normalize_city() so "New York" and "new  york"
+    are one city, shown with the spelling first seen.
+    """
+
+    def __init__(self, history_path, summary_path=None, segments=None):
+        self.history_path = history_path
+        self.summary_path = summary_path or history_path + ".summary.json"
+        self.segments = segments  # Callable returning closed segment paths, oldest first
+        self._state = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _empty_state():
+        return {"version": SUMMARY_VERSION, "size": 0, "mtime": 0, "total_entries": 0,
+                "first_seen": None, "last_seen": None, "cities": {}, "dates": {}}
+
+    def _load(self):
+        try:
+            with open(self.summary_path, "r") as f:
+                state = json.load(f)
+            if state.get("version") == SUMMARY_VERSION and \
+                    {"size", "mtime", "total_entries", "cities", "dates"} <= state.keys():
+                return state
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def _save(self):
+        tmp_path = self.summary_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._state, f)
+        os.replace(tmp_path, self.summary_path)
+
+    def _add(self, entry):
+        state = self._state
+        city = " ".join(str(entry.get('city', '')).split())
+        date = str(entry.get('date', ''))
+        seen = seen_time(entry)
+
+        state["total_entries"] += 1
+        state["dates"][date] = state["dates"].get(date, 0) + 1
+
+        city_key = normalize_city(city)
+        city_stats = state["cities"].get(city_key)
+        if city_stats is None:
+            state["cities"][city_key] = {"name": city, "count": 1, "first_seen": seen, "last_seen": seen}
+        else:
+            city_stats["count"] += 1
+            city_stats["first_seen"] = min(city_stats["first_seen"], seen)
+            city_stats["last_seen"] = max(city_stats["last_seen"], seen)
+
+        state["first_seen"] = seen if state["first_seen"] is None else min(state["first_seen"], seen)
+        state["last_seen"] = seen if state["last_seen"] is None else max(state["last_seen"], seen)
+
+    def _scan_segment(self, path):
+        with gzip.open(path, "rb") as f:
+            for line in f:
+                try:
+                    self._add(_json_loads(line))
+                except ValueError:
+                    continue
+
+    def _scan(self, start):
+        """Add history lines from byte offset start; returns the offset reached."""
+        offset = start
+        with open(self.history_path, "rb") as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Half-written last line - count it next time
+                offset += len(line)
+                try:
+                    self._add(_json_loads(line))
+                except ValueError:
+                    continue
+        return offset
+
+    def _file_state(self):
+        stat = os.stat(self.history_path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def rebuild(self):
+        """Recount the whole history, closed segments included."""
+        with self._lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        self._state = self._empty_state()
+        for path in (self.segments() if self.segments else ()):
+            self._scan_segment(path)
+        if os.path.exists(self.history_path):
+            size, mtime = self._file_state()
+            self._state["size"] = self._scan(0)
+            self._state["mtime"] = mtime if self._state["size"] == size else 0
+        self._save()
+
+    def _refresh(self):
+        if self._state is None:
+            self._state = self._load()
+
+        if not os.path.exists(self.history_path):
+            # No active file: fine right after a rotation, otherwise recount the segments
+            if self._state is None or self._state["size"]:
+                self._rebuild()
+            return
+
+        size, mtime = self._file_state()
+        state = self._state
+        if state is None or state["size"] > size or (state["size"] == size and state["mtime"] != mtime):
+            print(f"Rebuilding history summary {self.summary_path}")
+            self._rebuild()
+        elif state["size"] < size:
+            # Only count what was written since the summary was last updated
+            state["size"] = self._scan(state["size"])
+            state["mtime"] = mtime if state["size"] == size else 0
+            self._save()
+
+    def record_append(self, offset, entry):
+        """Count one entry that was just appended to the history at offset."""
+        self.record_appends(offset, [entry])
+
+    def record_appends(self, start, entries):
+        """Count entries that were just appended as one write starting at byte start.
+
+        Only applied when the summary was current before the write;
+        otherwise the next read catches up from the file.
+        """
+        with self._lock:
+            if self._state is None:
+                self._state = self._load()
+            if self._state is None or self._state["size"] != start:
+                return
+            for entry in entries:
+                self._add(entry)
+            self._state["size"], self._state["mtime"] = self._file_state()
+            self._save()
+
+    def sync(self):
+        """Catch up with the history file, e.g. before it is rotated."""
+        with self._lock:
+            self._refresh()
+
+    def rotated(self):
+        """Keep the counts after the active file was closed into a segment.
+
+        Call sync() before rotating; the summary then carries on from the
+        new, empty active file.
+        """
+        with self._lock:
+            if self._state is None:
+                return
+            self._state["size"], self._state["mtime"] = 0, 0
+            self._save()
+
+    def get(self):
+        """Return the summary, catching up with the history file first if needed."""
+        with self._lock:
+            self._refresh()
+            state = self._state
+            return {
+                "total_entries": state["total_entries"],
+                "first_seen": state["first_seen"],
+                "last_seen": state["last_seen"],
+                "cities": {stats["name"]: {"count": stats["count"], "first_seen": stats["first_seen"],
+                                           "last_seen": stats["last_seen"]}
+                           for stats in state["cities"].values()},
+                "dates": dict(state["dates"])
+            }
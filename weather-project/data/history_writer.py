@@ -0,0 +1,101 @@
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class HistoryWriter:
+    """Queues history records and writes them in batches on a background thread.
+
+    Callers only put a record on a queue, so a lookup never waits on disk.
+    The writer thread hands everything queued to write_batch at once when
+    batch_size records are waiting or flush_interval seconds have passed
+    since the oldest one arrived, so a crash loses at most one interval.
+
+    Args:
+        write_batch (callable): Writes a list of records (runs on the writer thread)
+        flush_interval (float): Longest time a record waits before it is written
+        batch_size (int): Write as soon as this many records are waiting
+    """
+
+    def __init__(self, write_batch, flush_interval=1.0, batch_size=256):
+        self.write_batch = write_batch
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._thread = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def submit(self, record):
+        """Queue a record to be written.
+
+        After close() the record is written straight away instead, so late
+        saves (e.g. from a worker finishing during shutdown) aren't lost.
+        """
+        with self._lock:
+            if not self._closed:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+                    self._thread.start()
+                self._queue.put(record)
+                return
+        self._write([record])
+
+    def flush(self, timeout=None):
+        """Block until every record submitted so far has been written."""
+        with self._lock:
+            if self._thread is None or self._closed:
+                return
+            done = threading.Event()
+            self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self, timeout=None):
+        """Write everything still queued and stop the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            if thread is not None:
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join(timeout)
+
+    def _write(self, records):
+        if not records:
+            return
+        try:
+            self.write_batch(records)
+        except Exception as e:
+            print(f"Error saving weather data to history: {e}")
+
+    def _run(self):
+        pending = []
+        deadline = None
+        while True:
+            timeout = None if not pending else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None  # Interval is up
+
+            if item is _STOP:
+                self._write(pending)
+                return
+            if isinstance(item, threading.Event):
+                self._write(pending)
+                pending = []
+                item.set()
+                continue
+            if item is not None:
+                if not pending:
+                    deadline = time.monotonic() + self.flush_interval
+                pending.append(item)
+                if len(pending) < self.batch_size and time.monotonic() < deadline:
+                    continue
+
+            self._write(pending)
+            pending = []
@@ -0,0 +1,143 @@
+import os
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from data import data
+from data.exporters import EXPORT_FORMATS, write_records
+from data.records import HistoryRecord
+from features.group.graph import read_weather_data
+
+# "history": lookups saved by the app, "archive": the features/group weather CSVs
+SOURCES = ("history", "archive")
+METRICS = ("temperature", "humidity", "precip", "condition")
+
+# Query metric -> HistoryRecord field
+_HISTORY_FIELDS = {"temperature": "temp", "humidity": "humidity", "precip": "precip", "condition": "condition"}
+_ARCHIVE_METRICS = ("temperature", "humidity", "condition")
+_CATEGORY_COLUMNS = ("source", "city", "condition")
+
+
+def _history_frame(cities, start, end, metrics):
+    """Matching saved lookups as columns; filters go to the index / SQLite query."""
+    records = list(data.history_rows(cities=cities, start=start, end=end))
+    columns = {
+        "source": pd.Categorical(["history"] * len(records)),
+        "date": np.array([record.date for record in records], dtype="datetime64[us]"),
+        # The city as it was typed, the same key the cities filter matches
+        "city": pd.Categorical([record.city for record in records])
+    }
+    for metric in metrics:
+        values = [getattr(record, _HISTORY_FIELDS[metric]) for record in records]
+        if metric == "condition":
+            columns[metric] = pd.Categorical(values)
+        else:
+            columns[metric] = np.array(values, dtype=np.float64)
+    return pd.DataFrame(columns)
+
+
+def _archive_frame(cities, start, end, metrics):
+    """Matching rows of the group CSVs; filters are pushed into the Parquet cache read."""
+    wanted = [metric for metric in metrics if metric in _ARCHIVE_METRICS]
+    df = read_weather_data(cities=cities, start=start, end=end, columns=["date", "city"] + wanted)
+    if df is None:
+        df = pd.DataFrame({"date": np.array([], dtype="datetime64[us]"), "city": pd.Categorical([])})
+    df.insert(0, "source", pd.Categorical(["archive"] * len(df)))
+    for metric in metrics:
+        if metric not in df:
+            if metric == "condition":
+                df[metric] = pd.Categorical([None] * len(df))
+            else:
+                df[metric] = np.full(len(df), np.nan)
+    return df
+
+
+def _concat(frames, columns):
+    result = {}
+    for col in columns:
+        if col in _CATEGORY_COLUMNS:
+            # Category labels are plain strings in every source, so unify the label dtype first
+            parts = [frame[col].astype("category") for frame in frames]
+            parts = [part.cat.set_categories(part.cat.categories.astype(object)) for part in parts]
+            result[col] = union_categoricals(parts)
+        else:
+            result[col] = np.concatenate([frame[col].to_numpy(dtype=np.float64 if col != "date" else None)
+                                          for frame in frames])
+    return pd.DataFrame(result)
+
+
+def query(cities=None, start=None, end=None, metrics=METRICS, sources=SOURCES):
+    """Read weather rows from the saved history and the archived group CSVs as one table.
+
+    City and date filters are handed to each backend (the history index or
+    SQLite, and the archive's Parquet cache) so rows outside them are not
+    loaded.
+
+    Args:
+        cities (iterable): Only these cities (exact, case-insensitive); all when None
+        start (str): Only dates on or after this one (YYYY-MM-DD format)
+        end (str): Only dates on or before this one (YYYY-MM-DD format)
+        metrics (iterable): Any of METRICS
+        sources (iterable): Any of SOURCES
+
+    Returns:
+        DataFrame with source, date, city and one column per metric
+        (temperatures in °F; metrics a source doesn't have are NaN)
+    """
+    metrics = list(metrics)
+    unknown = [metric for metric in metrics if metric not in METRICS]
+    if unknown:
+        raise ValueError(f"Unknown metrics {unknown}. Choose from: {', '.join(METRICS)}")
+    unknown = [source for source in sources if source not in SOURCES]
+    if unknown:
+        raise ValueError(f"Unknown sources {unknown}. Choose from: {', '.join(SOURCES)}")
+    if isinstance(cities, str):
+        cities = [cities]
+
+    frames = []
+    if "archive" in sources:
+        frames.append(_archive_frame(cities, start, end, metrics))
+    if "history" in sources:
+        frames.append(_history_frame(cities, start, end, metrics))
+    return _concat(frames, ["source", "date", "city"] + metrics)
+
+
+def query_records(df):
+    """Yield a query() result as HistoryRecords, the row type the exporters write."""
+    dates = df["date"].dt.strftime("%Y-%m-%d")
+    cities = df["city"].astype(object)
+    columns = []
+    for metric in ("temperature", "humidity", "precip", "condition"):
+        if metric not in df:
+            columns.append([None] * len(df))
+            continue
+        values = df[metric]
+        if metric != "condition":
+            # The archive stores float32; round off its float64 noise (32.2, not 32.20000076)
+            values = values.round(2)
+        # Missing values (e.g. precip in the archive) export as empty, not "nan"
+        columns.append(values.astype(object).where(values.notna(), None))
+    for city, date, temp, humidity, precip, condition in zip(cities, dates, *columns):
+        yield HistoryRecord(city, date, city, temp, humidity, precip, condition)
+
+
+def export_query(fmt="csv", filename=None, temp_unit="F", **query_args):
+    """Export a query() over the history and the archive with the history exporters.
+
+    Args:
+        fmt (str): One of EXPORT_FORMATS
+        filename (str): Custom filename for the export
+        temp_unit (str): Temperature unit "F" for Fahrenheit or "C" for Celsius
+        **query_args: cities, start, end and sources, as for query()
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'. Choose from: {', '.join(EXPORT_FORMATS)}")
+    if filename is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"weather_query_{timestamp}{EXPORT_FORMATS[fmt]}"
+
+    df = query(metrics=METRICS, **query_args)
+    export_path = os.path.join(os.path.dirname(data.__file__), filename)
+    rows_exported = write_records(export_path, query_records(df), fmt, temp_unit)
+    print(f"Exported {rows_exported} records to: {export_path}")
+    return export_path
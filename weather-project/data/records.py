@@ -0,0 +1,81 @@
+import sys
+from typing import NamedTuple
+
+# Version tag written into compact history lines; old lines have no "v" key
+RECORD_VERSION = 2
+
+
+class HistoryRecord(NamedTuple):
+    """One saved lookup, as read back from the history."""
+    city: str
+    date: str
+    name: str = None
+    temp: float = None
+    humidity: int = None
+    precip: float = 0.0
+    condition: str = None
+
+
+def extract_fields(data):
+    """Pull the exported fields out of an OpenWeatherMap current-weather payload."""
+    return (
+        data['name'],
+        data['main']['temp'],
+        data['main']['humidity'],
+        data.get('rain', {}).get('1h', 0),
+        data['weather'][0]['description'].title()
+    )
+
+
+def compact_record(city, date, data, keep_raw=False):
+    """Build a compact history record from an OpenWeatherMap payload.
+
+    Only the fields the app reads back are kept (as plain numbers and short
+    strings), instead of the whole response with coord, sys, clouds, etc.
+
+    Args:
+        city (str): City name as the user typed it
+        date (str): Lookup date (YYYY-MM-DD format)
+        data (dict): Current-weather API response
+        keep_raw (bool): Also store the full response under "data"
+    """
+    name, temp, humidity, precip, condition = extract_fields(data)
+    coord = data.get('coord', {})
+    record = {
+        "v": RECORD_VERSION,
+        "city": city,
+        "date": date,
+        "ts": data.get('dt'),
+        "id": data.get('id'),
+        "name": name,
+        "country": data.get('sys', {}).get('country'),
+        "lat": coord.get('lat'),
+        "lon": coord.get('lon'),
+        "temp": float(temp),
+        "humidity": int(humidity),
+        "precip": float(precip),
+        "condition": condition,
+        "icon": data['weather'][0].get('icon')
+    }
+    if keep_raw:
+        record["data"] = data
+    return record
+
+
+def entry_fields(entry):
+    """Return (name, temp, humidity, precip, condition) for an old or compact history entry.
+
+    Raises KeyError/IndexError if the entry is missing required data, like
+    reading the raw payload directly would.
+    """
+    if entry.get('v', 1) >= RECORD_VERSION:
+        name = entry['name']
+        temp = entry['temp']
+        humidity = entry['humidity']
+        precip = entry.get('precip', 0)
+        condition = entry['condition']
+    else:
+        name, temp, humidity, precip, condition = extract_fields(entry.get('data', {}))
+
+    # Cities and conditions repeat constantly, so share one string object per value
+    return sys.intern(name), temp, humidity, precip, sys.intern(condition)
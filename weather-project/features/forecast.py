@@ -1,7 +1,13 @@
 import requests
 import datetime
+import threading
+import time
+from array import array
 import os
 from dotenv import load_dotenv
+from data import client
+from data.cache import TTLCache, normalize_city
+from data.data import resolve_city, city_query_params, learn_city
 
 # Load environment variables
 load_dotenv()
@@ -9,14 +15,148 @@ load_dotenv()
 API_KEY = os.getenv("apiKey")
 FORECAST_URL = "https://api.openweathermap.org/data/2.5/forecast"
 
-def get_forecast(city):
-    """Get the 5-day forecast for a city"""
-    
-    # Build the request URL with the provided city
-    url = f"{FORECAST_URL}?q={city}&appid={API_KEY}&units=imperial"
+forecastCacheFile = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "forecast_cache.json")
+
+# The 5-day/3-hour forecast is reissued every few hours; cached forecasts stay fresh until the next issue
+FORECAST_CYCLE_HOURS = int(os.getenv("forecastCycleHours", "3"))
+# Minutes after each cycle boundary (UTC) before the new forecast is expected to be served
+FORECAST_CYCLE_DELAY = int(os.getenv("forecastCycleDelay", "10"))
+# How long after expiring a forecast may still be shown while a fresh one loads in the background (seconds)
+FORECAST_STALE_TTL = int(os.getenv("forecastStaleTTL", str(6 * 3600)))
+FORECAST_CACHE_SIZE = int(os.getenv("forecastCacheSize", "64"))
+FORECAST_CACHE_PERSIST = os.getenv("forecastCachePersist", "true").lower() in ("1", "true", "yes")
+
+class ForecastDay:
+    """Summary of one forecast day: what the forecast cards show."""
+    __slots__ = ('date', 'description', 'icon', 'high', 'low')
+
+    def __init__(self, date, description, icon, high, low):
+        self.date = date
+        self.description = description
+        self.icon = icon
+        self.high = high
+        self.low = low
+
+    def __repr__(self):
+        return f"ForecastDay({self.date!r}, {self.description!r}, high={self.high}, low={self.low})"
+
+
+class Forecast:
+    """5-day forecast for one city.
+
+    Per-day summaries are ForecastDay objects and the 3-hour slots are kept
+    as typed arrays (time, temp, humidity, precip) instead of the API's item
+    dicts. Reads like the old {date: summary} dict (items(), values(),
+    forecast[date]). The raw API response is only kept when asked for.
+    """
+    __slots__ = ('city', 'days', 'times', 'temps', 'humidity', 'precip', 'raw')
+
+    def __init__(self, city, days, times, temps, humidity, precip, raw=None):
+        self.city = city
+        self.days = days  # date -> ForecastDay, in date order
+        self.times = times  # Unix time of each 3-hour slot
+        self.temps = temps
+        self.humidity = humidity
+        self.precip = precip  # Rain in the 3 hours (mm)
+        self.raw = raw
+
+    @classmethod
+    def from_response(cls, city, data, keep_raw=False):
+        """Build a Forecast from a /forecast API response in one pass over its slots."""
+        items = data['list']
+        times = array('q', [0]) * len(items)
+        temps = array('d', [0.0]) * len(items)
+        humidity = array('d', [0.0]) * len(items)
+        precip = array('d', [0.0]) * len(items)
+
+        days = {}
+        for i, item in enumerate(items):
+            main = item['main']
+            temp = main['temp']
+            times[i] = item['dt']
+            temps[i] = temp
+            humidity[i] = main.get('humidity', 0)
+            precip[i] = item.get('rain', {}).get('3h', 0)
+
+            date = item['dt_txt'].split()[0]
+            day = days.get(date)
+            if day is None:
+                # The day's first slot describes it, as before
+                weather_info = item['weather'][0]
+                days[date] = ForecastDay(date, weather_info['description'], weather_info['icon'], temp, temp)
+            else:
+                day.high = max(day.high, temp)
+                day.low = min(day.low, temp)
+
+        return cls(city, days, times, temps, humidity, precip, data if keep_raw else None)
+
+    def to_dict(self):
+        """Plain-JSON form of the forecast, for the on-disk cache (raw isn't saved)."""
+        return {
+            'city': self.city,
+            'days': [[day.date, day.description, day.icon, day.high, day.low] for day in self.days.values()],
+            'times': self.times.tolist(),
+            'temps': self.temps.tolist(),
+            'humidity': self.humidity.tolist(),
+            'precip': self.precip.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a Forecast saved with to_dict()."""
+        days = {day[0]: ForecastDay(*day) for day in data['days']}
+        return cls(data['city'], days, array('q', data['times']), array('d', data['temps']),
+                   array('d', data['humidity']), array('d', data['precip']))
+
+    def __len__(self):
+        return len(self.days)
+
+    def __iter__(self):
+        return iter(self.days)
+
+    def __contains__(self, date):
+        return date in self.days
+
+    def __getitem__(self, date):
+        return self.days[date]
+
+    def keys(self):
+        return self.days.keys()
+
+    def values(self):
+        return self.days.values()
+
+    def items(self):
+        return self.days.items()
+
+
+def next_forecast_issue(now=None):
+    """Wall-clock time the next forecast is expected, i.e. when a cached one goes stale."""
+    now = time.time() if now is None else now
+    cycle = FORECAST_CYCLE_HOURS * 3600
+    delay = FORECAST_CYCLE_DELAY * 60
+    issue = (now - delay) // cycle * cycle + cycle + delay
+    return issue
+
+
+forecast_cache = TTLCache(max_size=FORECAST_CACHE_SIZE, ttl=FORECAST_CYCLE_HOURS * 3600,
+                          persist_path=forecastCacheFile if FORECAST_CACHE_PERSIST else None,
+                          stale_ttl=FORECAST_STALE_TTL,
+                          serialize=Forecast.to_dict, deserialize=Forecast.from_dict)
+_refreshing = set()  # Cache keys with a background refresh in flight
+_refreshing_lock = threading.Lock()
+
+
+def _fetch_forecast(city, keep_raw=False, known=None):
+    # Build the request parameters with the provided city (its id when it's known)
+    params = {
+        **city_query_params(city, known),
+        "appid": API_KEY,
+        "units": "imperial"
+    }
     
     try:
-        response = requests.get(url)
+        response = client.get(FORECAST_URL, params=params)
         
         # Handle API errors similar to data.py
         if response.status_code == 404:
@@ -25,64 +165,114 @@ def get_forecast(city):
             raise RuntimeError(f"API error: {response.status_code} - {response.text}")
         
         data = response.json()
-        
-        # Process the forecast data
-        forecast = {}
-        for item in data['list']:
-            date = item['dt_txt'].split()[0]
-            if date not in forecast:
-                forecast[date] = []
-            forecast[date].append(item)
-        
-        # Build daily summary
-        daily_forecast = {}
-        for date, entries in forecast.items():
-            temps = [entry['main']['temp'] for entry in entries]
-            weather_info = entries[0]['weather'][0]
-            
-            daily_forecast[date] = {
-                'description': weather_info['description'],
-                'icon': weather_info['icon'],
-                'high': max(temps),
-                'low': min(temps),
-                'entries': entries  # Keep full data if needed
-            }
-        
-        return daily_forecast
+        forecast = Forecast.from_response(city, data, keep_raw=keep_raw)
         
     except requests.RequestException as e:
         raise RuntimeError(f"Network error: {e}")
 
+    known = learn_city(city, data) or known
+    cache_key = known.cache_key if known else normalize_city(city)
+    cached = forecast
+    if forecast.raw is not None:
+        # Cached forecasts are only served without raw, so don't keep the payload alive in the cache
+        cached = Forecast(forecast.city, forecast.days, forecast.times, forecast.temps,
+                          forecast.humidity, forecast.precip)
+    forecast_cache.set(cache_key, cached, expires_at=next_forecast_issue())
+    return forecast
+
+
+def _refresh_in_background(city, cache_key, known=None):
+    with _refreshing_lock:
+        if cache_key in _refreshing:
+            return
+        _refreshing.add(cache_key)
+
+    def refresh():
+        try:
+            _fetch_forecast(city, known=known)
+        except Exception as e:
+            print(f"Background forecast refresh for {city} failed: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(cache_key)
+
+    threading.Thread(target=refresh, name=f"forecast-refresh-{cache_key}", daemon=True).start()
+
+
+def get_forecast(city, keep_raw=False, use_cache=True):
+    """Get the 5-day forecast for a city as a Forecast.
+
+    Names already seen resolve to the city's id (see data.cities), so the
+    request skips server-side geocoding and every spelling of a city shares
+    one cache entry. Forecasts are cached per city until the next forecast issue (every
+    forecastCycleHours). After that the old forecast is still returned
+    straight away for up to forecastStaleTTL seconds while a fresh one is
+    fetched in the background.
+
+    Args:
+        city (str): City name
+        keep_raw (bool): Also keep the full API response in forecast.raw
+            (always fetched, since cached forecasts don't keep it)
+        use_cache (bool): Serve and refresh cached forecasts
+    """
+    known = resolve_city(city)
+    cache_key = known.cache_key if known else normalize_city(city)
+    if use_cache and not keep_raw:
+        forecast, fresh = forecast_cache.lookup(cache_key)
+        if forecast is not None:
+            if not fresh:
+                _refresh_in_background(city, cache_key, known)
+            return forecast
+
+    return _fetch_forecast(city, keep_raw=keep_raw, known=known)
+
+
+def get_forecast_cache_stats():
+    """Return hit/miss counters for the forecast cache."""
+    return forecast_cache.stats()
+
+def get_forecast_many(cities, max_workers=client.BATCH_CONCURRENCY):
+    """Get forecasts for many cities concurrently.
+
+    Yields (city, forecast, error) tuples as each request completes; one
+    failing city doesn't stop the others.
+    """
+    return client.run_batch(get_forecast, cities, max_workers=max_workers)
+
 def get_weather_icon_url(icon_code):
     """Get the URL for a weather icon from OpenWeatherMap"""
     return f"https://openweathermap.org/img/wn/{icon_code}@2x.png"
 
+# Weather emoji for every icon code OpenWeatherMap uses
+WEATHER_EMOJI = {
+    '01d': '☀️',  # clear sky day
+    '01n': '🌙',  # clear sky night
+    '02d': '⛅',  # few clouds day
+    '02n': '☁️',  # few clouds night
+    '03d': '☁️',  # scattered clouds
+    '03n': '☁️',  # scattered clouds
+    '04d': '☁️',  # broken clouds
+    '04n': '☁️',  # broken clouds
+    '09d': '🌧️',  # shower rain
+    '09n': '🌧️',  # shower rain
+    '10d': '🌦️',  # rain day
+    '10n': '🌧️',  # rain night
+    '11d': '⛈️',  # thunderstorm
+    '11n': '⛈️',  # thunderstorm
+    '13d': '❄️',  # snow
+    '13n': '❄️',  # snow
+    '50d': '🌫️',  # mist
+    '50n': '🌫️',  # mist
+}
+
+KNOWN_ICON_CODES = tuple(WEATHER_EMOJI)
+
 def get_local_weather_emoji(icon_code):
     """Get a weather emoji based on the icon code (fallback if images don't load)"""
-    icon_map = {
-        '01d': '☀️',  # clear sky day
-        '01n': '🌙',  # clear sky night
-        '02d': '⛅',  # few clouds day
-        '02n': '☁️',  # few clouds night
-        '03d': '☁️',  # scattered clouds
-        '03n': '☁️',  # scattered clouds
-        '04d': '☁️',  # broken clouds
-        '04n': '☁️',  # broken clouds
-        '09d': '🌧️',  # shower rain
-        '09n': '🌧️',  # shower rain
-        '10d': '🌦️',  # rain day
-        '10n': '🌧️',  # rain night
-        '11d': '⛈️',  # thunderstorm
-        '11n': '⛈️',  # thunderstorm
-        '13d': '❄️',  # snow
-        '13n': '❄️',  # snow
-        '50d': '🌫️',  # mist
-        '50n': '🌫️',  # mist
-    }
-    return icon_map.get(icon_code, '🌤️')  # default to partly sunny
+    return WEATHER_EMOJI.get(icon_code, '🌤️')  # default to partly sunny
 
 def print_forecast(forecast_data):
     """Print a formatted forecast summary"""
     for date, data in forecast_data.items():
-        emoji = get_local_weather_emoji(data['icon'])
-        print(f"{date}: {emoji} {data['description']}, High: {data['high']:.1f}°F, Low: {data['low']:.1f}°F")
\ No newline at end of file
+        emoji = get_local_weather_emoji(data.icon)
+        print(f"{date}: {emoji} {data.description}, High: {data.high:.1f}°F, Low: {data.low:.1f}°F")
\ No newline at end of file
@@ -0,0 +1,239 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from features.group.graph import GROUP_DIR, PARQUET_AVAILABLE, load_weather_data
+
+# Numeric columns the analytics summarize
+METRICS = ['temperature', 'humidity']
+STATE_FILE = ".analytics_state.parquet"
+
+# Period kinds kept in WeatherAnalytics -> how a date is turned into its key
+PERIODS = {
+    'week': lambda dates: dates.dt.to_period('W').dt.start_time.dt.strftime('%Y-%m-%d'),
+    'month': lambda dates: dates.dt.strftime('%Y-%m'),
+    'clim': lambda dates: dates.dt.month.astype(str)  # Calendar month, for climatology
+}
+
+# Resampling periods, labelled by their first day (weeks start on Monday) like PERIODS
+PERIOD_GROUPERS = {
+    'week': dict(freq='W-MON', closed='left', label='left'),
+    'month': dict(freq='MS')
+}
+
+
+def resample_by_city(df, period='week', metrics=METRICS):
+    """Mean of each metric per city per "week" or "month" (or any other pandas frequency).
+
+    Returns a DataFrame indexed by (city, date), where date is the first day
+    of the period - the same keys as WeatherAnalytics.resampled().
+    """
+    grouper = pd.Grouper(key='date', **PERIOD_GROUPERS.get(period, dict(freq=period)))
+    return df.groupby(['city', grouper], observed=True)[list(metrics)].mean()
+
+
+def rolling_means(df, window=7, metrics=METRICS):
+    """Rolling mean over the last `window` readings of each city, in date order.
+
+    Returns the date, city and one <metric>_rolling column per metric, in
+    the same row order as df.
+    """
+    ordered = df.sort_values(['city', 'date'], kind='stable')
+    rolled = (ordered.groupby('city', observed=True, sort=False)[list(metrics)]
+              .rolling(window, min_periods=1).mean()
+              .reset_index(level=0, drop=True))
+    result = df[['date', 'city']].copy()
+    for metric in metrics:
+        result[f'{metric}_rolling'] = rolled[metric].reindex(df.index)
+    return result
+
+
+def climatology(df, metric='temperature'):
+    """Mean, standard deviation and count of a metric per city and calendar month."""
+    months = df['date'].dt.month.rename('month')
+    return df.groupby([df['city'], months], observed=True)[metric].agg(['mean', 'std', 'count'])
+
+
+def anomalies(df, metric='temperature', threshold=2.0, climate=None):
+    """Flag readings more than `threshold` standard deviations from their city's monthly climatology.
+
+    Args:
+        df (DataFrame): Rows to check
+        metric (str): Column to check
+        threshold (float): z-score beyond which a reading is an anomaly
+        climate (DataFrame): climatology() style table to compare against,
+            computed from df when not given
+
+    Returns:
+        The date, city and metric of the anomalous rows with their z-score
+    """
+    if climate is None:
+        climate = climatology(df, metric)
+    keys = pd.MultiIndex.from_arrays([df['city'].astype(str), df['date'].dt.month])
+    climate = climate.set_axis(pd.MultiIndex.from_arrays(
+        [climate.index.get_level_values(0).astype(str), climate.index.get_level_values(1).astype(int)]))
+    expected = climate.reindex(keys)
+
+    z = (df[metric].to_numpy(dtype=np.float64) - expected['mean'].to_numpy()) / expected['std'].to_numpy()
+    flagged = np.abs(z) > threshold  # NaN (no climatology yet) compares False
+    result = df.loc[flagged, ['date', 'city', metric]].copy()
+    result['z_score'] = z[flagged]
+    return result
+
+
+def condition_frequencies(df, normalize=False):
+    """Table of how often each condition was reported per city (shares of each city's days with normalize)."""
+    return pd.crosstab(df['city'], df['condition'], normalize='index' if normalize else False)
+
+
+class WeatherAnalytics:
+    """Running sums behind the analytics, updated incrementally as rows are appended.
+
+    Sums, sums of squares and counts are kept per (kind, city, key) for the
+    weekly and monthly means, the monthly climatology and the condition
+    counts, so adding new rows only aggregates those rows. The number of rows
+    already counted from each source file is remembered, so passing the
+    whole (re)loaded data to update() only adds what was appended.
+    """
+
+    def __init__(self):
+        self._sums = pd.DataFrame(
+            {'sum': [], 'sumsq': [], 'count': []},
+            index=pd.MultiIndex.from_arrays([[], [], []], names=['kind', 'city', 'key']))
+        self.rows_seen = {}  # source_file -> rows already counted
+
+    def _new_rows(self, df):
+        if 'source_file' not in df or not self.rows_seen:
+            return df
+        position = df.groupby('source_file', observed=True).cumcount()
+        seen = df['source_file'].astype(str).map(self.rows_seen).fillna(0)
+        return df[position.to_numpy() >= seen.to_numpy()]
+
+    @staticmethod
+    def _aggregate(df):
+        parts = []
+        city = df['city'].astype(str)
+        dated = df['date'].notna()
+        for period, to_key in PERIODS.items():
+            keys = to_key(df.loc[dated, 'date'])
+            for metric in METRICS:
+                values = df.loc[dated, metric].astype(np.float64)
+                frame = pd.DataFrame({'sum': values, 'sumsq': values * values,
+                                      'count': values.notna().astype(np.float64)})
+                part = frame.groupby([city[dated], keys]).sum()
+                part.index = pd.MultiIndex.from_arrays(
+                    [np.full(len(part), f'{metric}:{period}'), part.index.get_level_values(0),
+                     part.index.get_level_values(1)], names=['kind', 'city', 'key'])
+                parts.append(part)
+
+        has_condition = df['condition'].notna()
+        counts = pd.Series(1.0, index=df.index)[has_condition].groupby(
+            [city[has_condition], df.loc[has_condition, 'condition'].astype(str)]).sum()
+        conditions = pd.DataFrame({'sum': 0.0, 'sumsq': 0.0, 'count': counts})
+        conditions.index = pd.MultiIndex.from_arrays(
+            [np.full(len(conditions), 'condition'), conditions.index.get_level_values(0),
+             conditions.index.get_level_values(1)], names=['kind', 'city', 'key'])
+        parts.append(conditions)
+        return pd.concat(parts)
+
+    def update(self, df):
+        """Add rows not counted yet; returns how many were added."""
+        new = self._new_rows(df)
+        if len(new):
+            self._sums = pd.concat([self._sums, self._aggregate(new)]).groupby(level=[0, 1, 2]).sum()
+        if 'source_file' in new:
+            for source, rows in new['source_file'].astype(str).value_counts().items():
+                self.rows_seen[source] = self.rows_seen.get(source, 0) + int(rows)
+        return len(new)
+
+    def _kind(self, kind):
+        try:
+            return self._sums.xs(kind, level='kind')
+        except KeyError:
+            return self._sums.iloc[:0].droplevel('kind')
+
+    def resampled(self, period='month', metric='temperature'):
+        """Mean of a metric per city and week ("week") or calendar month of each year ("month").
+
+        Indexed by (city, date) with the first day of each period, like resample_by_city().
+        """
+        sums = self._kind(f'{metric}:{period}')
+        means = (sums['sum'] / sums['count']).rename(metric)
+        key_format = '%Y-%m-%d' if period == 'week' else '%Y-%m'
+        means.index = pd.MultiIndex.from_arrays(
+            [means.index.get_level_values('city'),
+             pd.to_datetime(means.index.get_level_values('key'), format=key_format)],
+            names=['city', 'date'])
+        return means.sort_index()
+
+    def climatology(self, metric='temperature'):
+        """Mean, standard deviation and count per city and calendar month, like climatology()."""
+        sums = self._kind(f'{metric}:clim')
+        count = sums['count']
+        variance = (sums['sumsq'] - sums['sum'] ** 2 / count) / (count - 1)
+        table = pd.DataFrame({'mean': sums['sum'] / count,
+                              'std': np.sqrt(variance.clip(lower=0)),
+                              'count': count.astype(np.int64)})
+        table.index = pd.MultiIndex.from_arrays(
+            [table.index.get_level_values('city'), table.index.get_level_values('key').astype(int)],
+            names=['city', 'month'])
+        return table.sort_index()
+
+    def anomalies(self, df, metric='temperature', threshold=2.0):
+        """Flag rows of df against the accumulated climatology (see anomalies())."""
+        return anomalies(df, metric, threshold, climate=self.climatology(metric))
+
+    def condition_table(self, normalize=False):
+        """Condition counts per city, like condition_frequencies()."""
+        table = self._kind('condition')['count'].unstack('key', fill_value=0)
+        table = table.rename_axis(index='city', columns='condition')
+        if normalize:
+            return table.div(table.sum(axis=1), axis=0)
+        return table.astype(np.int64)
+
+    def save(self, path):
+        """Write the running sums to a Parquet file (needs pyarrow)."""
+        table = self._sums.reset_index()
+        tmp_path = path + ".tmp"
+        table.to_parquet(tmp_path, index=False)
+        with open(tmp_path + ".json", "w") as f:
+            json.dump(self.rows_seen, f)
+        os.replace(tmp_path + ".json", path + ".json")
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read running sums written by save()."""
+        analytics = cls()
+        table = pd.read_parquet(path)
+        analytics._sums = table.set_index(['kind', 'city', 'key'])
+        with open(path + ".json", "r") as f:
+            analytics.rows_seen = json.load(f)
+        return analytics
+
+
+def load_analytics(directory=GROUP_DIR, use_cache=True):
+    """Return WeatherAnalytics for the weather CSVs, reusing and extending the saved state.
+
+    Only rows appended to the CSVs since the state was saved are aggregated.
+    Returns (analytics, data) so the row-level functions can use the same data.
+    """
+    df = load_weather_data(directory=directory, use_cache=use_cache)
+    state_path = os.path.join(directory, STATE_FILE)
+    analytics = None
+    if use_cache and PARQUET_AVAILABLE and os.path.exists(state_path):
+        try:
+            analytics = WeatherAnalytics.load(state_path)
+        except Exception as e:
+            print(f"⚠️  Ignoring unreadable analytics state {state_path}: {e}")
+    if analytics is not None and df is not None:
+        # A file with fewer rows than were counted was rewritten, not appended to
+        rows = df['source_file'].astype(str).value_counts()
+        if any(rows.get(source, 0) < seen for source, seen in analytics.rows_seen.items()):
+            analytics = None
+    if analytics is None:
+        analytics = WeatherAnalytics()
+
+    if df is not None and analytics.update(df) and use_cache and PARQUET_AVAILABLE:
+        analytics.save(state_path)
+    return analytics, df
@@ -1,111 +1,493 @@
 import pandas as pd 
 import matplotlib.pyplot as plt 
+from matplotlib.figure import Figure
+import matplotlib.dates as mdates
+import numpy as np
 import os 
+import argparse
 import glob 
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pandas.api.types import union_categoricals
 
+# Optional: cache the parsed data as Parquet so repeat runs skip CSV parsing
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
 
-def analyze_weather_files():
+# The group CSVs live next to this script
+GROUP_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_FILE = ".graph_cache.parquet"
+# Bump when the way files are read changes, so old caches are not reused
+CACHE_VERSION = 4
+
+# Column name variants used by the different files -> name used in the combined data
+CITY_COLUMNS = ['city', 'location']
+TEMP_COLUMNS = ['avg_temp', 'avg_temp_F', 'temperature', 'avg_temp_C']
+CONDITION_COLUMNS = ['condition', 'conditions']
+# Temperature columns in Celsius, converted so every file is in °F
+CELSIUS_COLUMNS = ['avg_temp_C']
+
+# Rows per Parquet row group. The cache is sorted by city, so a city filter
+# skips every group whose city_key min/max statistics can't hold it
+CACHE_ROW_GROUP_SIZE = 8 * 1024
+# Extra cache columns: the lowercase city the filters match, and each row's original position
+CACHE_KEY_COLUMN = 'city_key'
+CACHE_ORDER_COLUMN = '_row'
+
+# Fewer files than this are read in this process; starting workers would cost more
+MIN_FILES_FOR_POOL = 16
+
+COLUMNS = ['date', 'city', 'temperature', 'humidity', 'condition', 'source_file']
+CATEGORY_COLUMNS = ['city', 'condition', 'source_file']
+
+
+def _pick_column(header, candidates):
+    for col in candidates:
+        if col in header:
+            return col
+    return None
+
+
+def read_weather_csv(file_name):
+    """Read one weather CSV with only the columns the charts use, already typed.
+
+    City and condition are read as categories, temperature (°F) and
+    humidity as float32 and the date as a datetime, and whichever column variant the file uses
+    is renamed to COLUMNS.
+    Raises ValueError if the file has no city or temperature column.
     """
-    Loop through weather files (weather1.py to weather4.py), find unique cities,
-    and display temperature data using matplotlib.
-    
-    This function will:
-    1. Find all weather files matching the pattern
-    2. Load and combine data from all files
-    3. Find unique cities
-    4. Extract temperature data (from avg_temp or temperature column)
-    5. Create visualizations of the temperature data
+    header = pd.read_csv(file_name, nrows=0).columns
+    city_col = _pick_column(header, CITY_COLUMNS)
+    temp_col = _pick_column(header, TEMP_COLUMNS)
+    if city_col is None or temp_col is None:
+        raise ValueError(f"no city ({', '.join(CITY_COLUMNS)}) or temperature "
+                         f"({', '.join(TEMP_COLUMNS)}) column")
+    condition_col = _pick_column(header, CONDITION_COLUMNS)
+    date_col = 'date' if 'date' in header else None
+    humidity_col = 'humidity' if 'humidity' in header else None
+
+    renames = {city_col: 'city', temp_col: 'temperature'}
+    dtypes = {city_col: 'category', temp_col: 'float32'}
+    if condition_col:
+        renames[condition_col] = 'condition'
+        dtypes[condition_col] = 'category'
+    if date_col:
+        renames[date_col] = 'date'
+    if humidity_col:
+        renames[humidity_col] = 'humidity'
+        dtypes[humidity_col] = 'float32'
+
+    df = pd.read_csv(file_name, usecols=list(renames), dtype=dtypes,
+                     parse_dates=[date_col] if date_col else False, date_format='%Y-%m-%d')
+    df = df.rename(columns=renames)
+    if temp_col in CELSIUS_COLUMNS:
+        df['temperature'] = df['temperature'] * np.float32(9 / 5) + np.float32(32)
+
+    # Files without some of the columns still line up with the rest
+    if 'date' not in df:
+        df['date'] = pd.NaT
+    if 'humidity' not in df:
+        df['humidity'] = np.full(len(df), np.nan, dtype=np.float32)
+    if 'condition' not in df:
+        # Empty categories of the same dtype as the city names, so the files can be combined
+        no_categories = df['city'].cat.categories[:0]
+        df['condition'] = pd.Categorical.from_codes(np.full(len(df), -1), categories=no_categories)
+    df['source_file'] = pd.Categorical([os.path.basename(file_name)] * len(df))
+    return df[COLUMNS]
+
+
+def combine_frames(frames):
+    """Concatenate typed frames, keeping the category columns as categories."""
+    columns = {}
+    for col in COLUMNS:
+        if col in CATEGORY_COLUMNS:
+            # Plain concat would turn categoricals with different categories into objects
+            columns[col] = union_categoricals([frame[col] for frame in frames])
+        else:
+            columns[col] = np.concatenate([frame[col].to_numpy() for frame in frames])
+    return pd.DataFrame(columns)
+
+
+def _read_file(file_name):
+    """Worker: read one file, returning (file_name, df, error, size_bytes)."""
+    size = os.path.getsize(file_name) if os.path.exists(file_name) else 0
+    try:
+        return file_name, read_weather_csv(file_name), None, size
+    except Exception as e:
+        return file_name, None, str(e), size
+
+
+def ingest_weather_files(weather_files, workers=None):
+    """Read many weather CSVs, in a process pool when there are lots of them.
+
+    A file that can't be read is reported and skipped without stopping the
+    run. The frames are combined once at the end.
+
+    Args:
+        weather_files (list): CSV paths
+        workers (int): Number of processes, defaults to the CPU count
+
+    Returns:
+        (DataFrame or None, report) where report is a dict with files,
+        loaded, errors ({file: message}), rows, bytes, seconds, rows_per_s
+        and mb_per_s
     """
-    
-    # List to store all weather data from different files
-    all_weather_data = []
-    
-    # Define the weather file pattern to search for
-    file_pattern = "weather*.csv"  # Changed from .py to .csv since we're working with data files
-    
-    # Find all files matching the weather pattern
-    weather_files = glob.glob(file_pattern)
-    
-    # If no CSV files found, try looking for Python files (in case they contain data)
-    if not weather_files:
-        weather_files = ["weather1.py", "weather2.py", "weather3.py", "weather4.py"]
-        # Filter to only existing files
-        weather_files = [f for f in weather_files if os.path.exists(f)]
-    
-    # Check if any weather files were found
-    if not weather_files:
-        print("❌ No weather files found!")
-        print("Looking for: weather1.py, weather2.py, weather3.py, weather4.py")
-        print("Or CSV files matching pattern: weather*.csv")
+    weather_files = sorted(weather_files)
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+
+    if workers == 1 or len(weather_files) < MIN_FILES_FOR_POOL:
+        results = map(_read_file, weather_files)
+        frames, errors, total_bytes = _collect(results)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Batch small files per task so thousands of them don't each pay the IPC overhead
+            chunksize = max(1, len(weather_files) // (workers * 8))
+            frames, errors, total_bytes = _collect(executor.map(_read_file, weather_files, chunksize=chunksize))
+
+    combined_df = combine_frames(frames) if frames else None
+    seconds = time.perf_counter() - start
+    rows = len(combined_df) if combined_df is not None else 0
+    report = {
+        "files": len(weather_files),
+        "loaded": len(frames),
+        "errors": errors,
+        "rows": rows,
+        "bytes": total_bytes,
+        "seconds": seconds,
+        "rows_per_s": rows / seconds if seconds else 0.0,
+        "mb_per_s": total_bytes / 1e6 / seconds if seconds else 0.0
+    }
+    return combined_df, report
+
+
+def _collect(results):
+    frames, errors, total_bytes = [], {}, 0
+    for file_name, df, error, size in results:
+        total_bytes += size
+        if error is None:
+            frames.append(df)
+        else:
+            errors[file_name] = error
+            print(f"⚠️  Skipping {os.path.basename(file_name)}: {error}")
+    return frames, errors, total_bytes
+
+
+def _source_stamps(weather_files):
+    """(name, size, mtime) for each source file, so the cache notices any change."""
+    stamps = []
+    for file_name in sorted(weather_files):
+        stat = os.stat(file_name)
+        stamps.append([os.path.basename(file_name), stat.st_size, stat.st_mtime_ns])
+    return stamps
+
+
+def _cache_is_fresh(cache_path, stamps):
+    """Check the cache's recorded sources against the files, reading only its footer."""
+    if not PARQUET_AVAILABLE or not os.path.exists(cache_path):
+        return False
+    try:
+        metadata = pq.read_schema(cache_path).metadata or {}
+        cached_stamps = json.loads(metadata.get(b'weather_sources', b'null'))
+    except Exception as e:
+        print(f"⚠️  Ignoring unreadable cache {cache_path}: {e}")
+        return False
+    return isinstance(cached_stamps, dict) and cached_stamps.get('version') == CACHE_VERSION and \
+        cached_stamps.get('sources') == stamps
+
+
+def _city_keys(cities):
+    """Lowercase, stripped city names: what the city filters compare."""
+    return pd.Series(cities, dtype=object).astype(str).str.strip().str.lower()
+
+
+def _read_cached_table(cache_path, columns, filters=None):
+    """Read columns of the cache in the original row order."""
+    table = pq.read_table(cache_path, columns=list(columns) + [CACHE_ORDER_COLUMN], filters=filters)
+    table = table.take(pc.sort_indices(table[CACHE_ORDER_COLUMN]))
+    return table.drop_columns([CACHE_ORDER_COLUMN]).to_pandas()
+
+
+def _read_cache(cache_path, stamps):
+    if not _cache_is_fresh(cache_path, stamps):
+        return None
+    return _read_cached_table(cache_path, COLUMNS)
+
+
+def _write_cache(cache_path, df, stamps):
+    if not PARQUET_AVAILABLE:
         return
-    
-    # Loop through each weather file
-    for file_name in weather_files:
-        print(f"📖 Processing file: {file_name}")
-        
+    # Sorted by city so each row group holds few cities and filtered reads can skip the rest
+    cached = df.assign(**{CACHE_KEY_COLUMN: _city_keys(df['city']).to_numpy(),
+                          CACHE_ORDER_COLUMN: np.arange(len(df), dtype=np.int64)})
+    cached = cached.sort_values([CACHE_KEY_COLUMN, 'date'], kind='stable')
+    table = pa.Table.from_pandas(cached, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'weather_sources'] = json.dumps({'version': CACHE_VERSION, 'sources': stamps}).encode()
+    tmp_path = cache_path + ".tmp"
+    pq.write_table(table.replace_schema_metadata(metadata), tmp_path, row_group_size=CACHE_ROW_GROUP_SIZE)
+    os.replace(tmp_path, cache_path)
+
+
+def load_weather_data(file_pattern="weather*.csv", directory=GROUP_DIR, use_cache=True, workers=None):
+    """Load every weather CSV in directory into one typed DataFrame.
+
+    The parsed result is cached in a Parquet file (needs pyarrow) that is
+    used as long as no source file was added, removed or modified, so repeat
+    runs don't parse the CSVs again.
+
+    Args:
+        file_pattern (str): Glob pattern of the weather files
+        directory (str): Folder holding the files, defaults to this script's folder
+        use_cache (bool): Read and write the Parquet cache
+        workers (int): Processes used to read the files (see ingest_weather_files)
+
+    Returns:
+        DataFrame with COLUMNS, or None if no file could be loaded
+    """
+    weather_files = glob.glob(os.path.join(glob.escape(directory), file_pattern))
+    if not weather_files:
+        return None
+
+    stamps = _source_stamps(weather_files)
+    cache_path = os.path.join(directory, CACHE_FILE)
+    if use_cache:
+        cached = _read_cache(cache_path, stamps)
+        if cached is not None:
+            print(f"📦 Loaded {len(cached)} rows from cache {cache_path}")
+            return cached
+
+    combined_df, report = ingest_weather_files(weather_files, workers)
+    print(f"📖 Loaded {report['rows']} rows from {report['loaded']}/{report['files']} files "
+          f"in {report['seconds']:.2f}s ({report['rows_per_s']:,.0f} rows/s, {report['mb_per_s']:.1f} MB/s)")
+    if combined_df is None:
+        return None
+
+    if use_cache:
         try:
-            # Try to read as CSV first
-            if file_name.endswith('.csv'):
-                # Read CSV file
-                df = pd.read_csv(file_name)
-                print(f"   ✅ Successfully loaded CSV with {len(df)} rows")
-            else:
-                # If it's a Python file, you might need custom logic here
-                # For now, skip Python files unless they're actually CSV data
-                print(f"   ⚠️  Skipping Python file: {file_name}")
-                print("      (Convert to CSV format for analysis)")
-                continue
-            
-            # Add source file information
-            df['source_file'] = file_name
-            
-            # Add to our combined dataset
-            all_weather_data.append(df)
-            
+            _write_cache(cache_path, combined_df, stamps)
         except Exception as e:
-            print(f"Error reading {file_name}: {str(e)}")
-            continue
-    
-    # Check if we have any data to work with
-    if not all_weather_data:
-        print("No valid data found in any files!")
-        return
-    
-    # Combine all data into one DataFrame
-    combined_df = pd.concat(all_weather_data, ignore_index=True)
-    
-    # Find unique cities
-    # Try different possible city column names
-    city_columns = ['city', 'location']
-    city_column = None
-    
-    for col in city_columns:
-        if col in combined_df.columns:
-            city_column = col
-            break
-    
-    # Get unique cities
-    unique_cities = combined_df[city_column].unique()
-    for i, city in enumerate(unique_cities, 1):
-        print(f"   {i}. {city}")
-    
-    # Find temperature column
-    temp_columns = ['avg_temp', 'temperature']
-    temp_column = None
-    
-    for col in temp_columns:
-        if col in combined_df.columns:
-            temp_column = col
-            break
+            print(f"⚠️  Could not write cache {cache_path}: {e}")
+    return combined_df
 
-    
-    # Set up the plot style
-    plt.style.use('default')
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
+
+def read_weather_data(cities=None, start=None, end=None, columns=None, file_pattern="weather*.csv",
+                      directory=GROUP_DIR):
+    """Load only the rows and columns asked for.
+
+    With pyarrow the city and date predicates are pushed into the read of
+    the Parquet cache (built first if it is missing or stale). The cache is
+    sorted by its city_key column, so row groups whose statistics can't
+    match are skipped without being decoded. Without pyarrow, or if the
+    cache could not be rewritten, the CSVs are loaded and then filtered.
+
+    Args:
+        cities (iterable): Only these cities (exact, case-insensitive)
+        start (str): Only dates on or after this one (YYYY-MM-DD format)
+        end (str): Only dates on or before this one (YYYY-MM-DD format)
+        columns (list): Columns to return, defaults to COLUMNS
+
+    Returns:
+        DataFrame, or None if there are no weather files
+    """
+    columns = list(columns or COLUMNS)
+    weather_files = glob.glob(os.path.join(glob.escape(directory), file_pattern))
+    if not weather_files:
+        return None
+
+    cache_path = os.path.join(directory, CACHE_FILE)
+    df = None
+    if PARQUET_AVAILABLE:
+        stamps = _source_stamps(weather_files)
+        if not _cache_is_fresh(cache_path, stamps):
+            df = load_weather_data(file_pattern, directory)  # (Re)builds the cache
+            if df is None:
+                return None
+        if df is None or _cache_is_fresh(cache_path, stamps):
+            filters = []
+            if cities is not None:
+                city_keys = sorted(set(_city_keys(list(cities))))
+                if not city_keys:
+                    return pq.read_schema(cache_path).empty_table().select(columns).to_pandas()
+                filters.append(pc.field(CACHE_KEY_COLUMN).isin(city_keys))
+            if start:
+                filters.append(pc.field('date') >= pa.scalar(pd.Timestamp(start).to_datetime64()))
+            if end:
+                filters.append(pc.field('date') <= pa.scalar(pd.Timestamp(end).to_datetime64()))
+            expression = None
+            for condition in filters:
+                expression = condition if expression is None else expression & condition
+            return _read_cached_table(cache_path, columns, filters=expression)
+
+    if df is None:  # No pyarrow, or the cache could not be rewritten: filter in memory
+        df = load_weather_data(file_pattern, directory, use_cache=False)
+    if df is None:
+        return None
+    mask = np.ones(len(df), dtype=bool)
+    if cities is not None:
+        mask &= _city_keys(df['city']).isin(set(_city_keys(list(cities)))).to_numpy()
+    if start:
+        mask &= (df['date'] >= pd.Timestamp(start)).to_numpy()
+    if end:
+        mask &= (df['date'] <= pd.Timestamp(end)).to_numpy()
+    return df.loc[mask, columns].reset_index(drop=True)
+
+
+def _quantile(sorted_values, starts, counts, q):
+    """Linear-interpolated quantile q of every group in a group-sorted array."""
+    position = starts + q * (counts - 1)
+    below = np.floor(position).astype(np.int64)
+    above = np.minimum(below + 1, starts + counts - 1)
+    fraction = position - below
+    return sorted_values[below] * (1 - fraction) + sorted_values[above] * fraction
+
+
+def aggregate_by_city(df, city_column='city', value_column='temperature', whisker=1.5):
+    """Compute the per-city statistics both charts need in one pass.
+
+    Rows are sorted once by (city, value); counts, means, quartiles, min/max,
+    box-plot whiskers and fliers for every city are then read off that
+    order with vectorized NumPy operations instead of one mask per city.
+
+    Args:
+        df (DataFrame): Weather data, city_column should be categorical
+        city_column (str): Column to group by
+        value_column (str): Column to summarize
+        whisker (float): Whisker reach in IQRs, as in matplotlib's boxplot
+
+    Returns:
+        DataFrame indexed by city with count, mean, min, q1, median, q3,
+        max, whislo, whishi and fliers (array of outliers) columns, in the
+        order cities first appear
+    """
+    values = df[value_column].to_numpy(dtype=np.float64)
+    codes, cities = pd.factorize(df[city_column], sort=False)
+    keep = (codes >= 0) & ~np.isnan(values)
+    codes, values = codes[keep], values[keep]
+
+    order = np.lexsort((values, codes))
+    codes, values = codes[order], values[order]
+
+    counts = np.bincount(codes, minlength=len(cities))
+    present = counts > 0
+    counts = counts[present]
+    cities = cities[present]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    ends = starts + counts - 1
+
+    q1 = _quantile(values, starts, counts, 0.25)
+    median = _quantile(values, starts, counts, 0.5)
+    q3 = _quantile(values, starts, counts, 0.75)
+    iqr = q3 - q1
+
+    # Whiskers reach the most extreme values within whisker * IQR of the box
+    group = np.repeat(np.arange(len(counts)), counts)
+    low = (q1 - whisker * iqr)[group]
+    high = (q3 + whisker * iqr)[group]
+    whislo = np.minimum.reduceat(np.where(values >= low, values, np.inf), starts)
+    whishi = np.maximum.reduceat(np.where(values <= high, values, -np.inf), starts)
+
+    outside = (values < low) | (values > high)
+    fliers = np.split(values[outside], np.cumsum(np.bincount(group[outside], minlength=len(counts)))[:-1])
+
+    return pd.DataFrame({
+        'count': counts,
+        'mean': np.add.reduceat(values, starts) / counts,
+        'min': values[starts],
+        'q1': q1,
+        'median': median,
+        'q3': q3,
+        'max': values[ends],
+        'whislo': whislo,
+        'whishi': whishi,
+        'fliers': fliers
+    }, index=pd.Index(cities, name=city_column))
+
+
+def box_stats(stats):
+    """Turn aggregate_by_city() output into the dicts Axes.bxp() draws."""
+    return [
+        {'label': str(city), 'mean': row.mean, 'med': row.median, 'q1': row.q1, 'q3': row.q3,
+         'whislo': row.whislo, 'whishi': row.whishi, 'fliers': row.fliers}
+        for city, row in zip(stats.index, stats.itertuples(index=False))
+    ]
+
+
+def downsample_lttb(x, y, threshold):
+    """Reduce a series to `threshold` points with Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last points and, from each bucket in between, the
+    point forming the largest triangle with the previously kept point and
+    the next bucket's average, so peaks and dips survive.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    every = (n - 2) / (threshold - 2)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+    return x[kept], y[kept]
+
+
+def downsample_minmax(x, y, threshold):
+    """Reduce a series to about `threshold` points, keeping each bucket's min and max."""
+    n = len(x)
+    if threshold >= n or threshold < 2:
+        return x, y
+
+    edges = np.linspace(0, n, threshold // 2 + 1).astype(np.int64)
+    kept = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            low = start + int(np.argmin(y[start:end]))
+            high = start + int(np.argmax(y[start:end]))
+            kept.extend(sorted({low, high}))
+    return x[kept], y[kept]
+
+
+DOWNSAMPLERS = {'lttb': downsample_lttb, 'minmax': downsample_minmax}
+
+
+def city_series(df, city_column='city', value_column='temperature', date_column='date'):
+    """Split the data into one date-sorted (dates, values) series per city, in one sort."""
+    values = df[value_column].to_numpy(dtype=np.float64)
+    dates = df[date_column].to_numpy(dtype='datetime64[s]')
+    codes, cities = pd.factorize(df[city_column], sort=False)
+    keep = (codes >= 0) & ~np.isnan(values) & ~np.isnat(dates)
+    codes, values, dates = codes[keep], values[keep], dates[keep]
+
+    order = np.lexsort((dates, codes))
+    codes, values, dates = codes[order], values[order], dates[order]
+    bounds = np.cumsum(np.bincount(codes, minlength=len(cities)))
+    starts = np.concatenate(([0], bounds[:-1]))
+    return {str(city): (dates[start:end], values[start:end])
+            for city, start, end in zip(cities, starts, bounds) if end > start}
+
+
+def draw_summary_charts(fig, stats):
+    """Draw the average bar chart and distribution box plot from aggregate_by_city() stats."""
+    ax1, ax2 = fig.subplots(2, 1)
     fig.suptitle('Weather Temperature Analysis', fontsize=16, fontweight='bold')
     
     #Average temperature by city (bar chart)
-    city_avg_temps = combined_df.groupby(city_column)[temp_column].mean().sort_values(ascending=False)
+    city_avg_temps = stats['mean'].sort_values(ascending=False)
     
     ax1.bar(range(len(city_avg_temps)), city_avg_temps.values, 
             color='skyblue', edgecolor='navy', alpha=0.7)
@@ -121,10 +503,7 @@ def analyze_weather_files():
         ax1.text(i, v + 0.5, f'{v:.1f}°F', ha='center', va='bottom', fontweight='bold')
     
     # Plot 2: Temperature distribution (box plot)
-    city_temps = [combined_df[combined_df[city_column] == city][temp_column].values 
-                  for city in unique_cities]
-    
-    box_plot = ax2.boxplot(city_temps, labels=unique_cities, patch_artist=True)
+    box_plot = ax2.bxp(box_stats(stats), patch_artist=True)
     ax2.set_title('Temperature Distribution by City', fontsize=14, fontweight='bold')
     ax2.set_xlabel('Cities', fontsize=12)
     ax2.set_ylabel('Temperature (°F)', fontsize=12)
@@ -138,11 +517,132 @@ def analyze_weather_files():
         patch.set_alpha(0.7)
     
     # Adjust layout to prevent overlap
-    plt.tight_layout()
+    fig.tight_layout()
+
+
+def _safe_filename(name):
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in name).strip("_") or "city"
+
+
+def _render_city_chart(job):
+    """Worker: draw one city's temperature series and save it; returns the path."""
+    city, dates, values, path = job
+    # A bare Figure renders with Agg and never touches pyplot or a display
+    fig = Figure(figsize=(10, 4))
+    ax = fig.subplots()
+    ax.plot(dates, values, color='navy', linewidth=0.8)
+    locator = mdates.AutoDateLocator()
+    ax.xaxis.set_major_locator(locator)
+    ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+    ax.set_title(f'{city} Temperature', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Temperature (°F)', fontsize=12)
+    ax.grid(alpha=0.3)
+    # Fixed margins; tight_layout measures every label and costs a third of the render
+    fig.subplots_adjust(left=0.08, right=0.98, top=0.9, bottom=0.1)
+    fig.savefig(path)
+    return path
+
+
+def render_city_charts(df, output_dir, fmt="png", max_points=1000, method="lttb", workers=None):
+    """Save one temperature-over-time chart per city, rendering in parallel.
+
+    Each series is downsampled to at most max_points before it is sent to a
+    worker, so years of daily data plot as fast as a few months.
+
+    Args:
+        df (DataFrame): Weather data from load_weather_data()
+        output_dir (str): Folder for the chart files
+        fmt (str): "png" or "svg"
+        max_points (int): Most points drawn per chart
+        method (str): "lttb" or "minmax" (see DOWNSAMPLERS)
+        workers (int): Number of processes, defaults to the CPU count
+
+    Returns:
+        list of the chart file paths
+    """
+    if method not in DOWNSAMPLERS:
+        raise ValueError(f"Unknown downsampling method '{method}'. Choose from: {', '.join(DOWNSAMPLERS)}")
+    downsample = DOWNSAMPLERS[method]
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs = []
+    for city, (dates, values) in city_series(df).items():
+        x, y = downsample(dates.astype(np.int64).astype(np.float64), values, max_points)
+        path = os.path.join(output_dir, f"{_safe_filename(city)}.{fmt}")
+        jobs.append((city, x.astype('datetime64[s]'), y, path))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) < 2:
+        return [_render_city_chart(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_render_city_chart, jobs))
+
+
+def analyze_weather_files(output_dir=None, fmt="png", per_city=False, workers=None, data=None):
+    """
+    Load the weather files, find unique cities, and chart their temperature
+    data using matplotlib.
     
-    # Show the plots
-    plt.show()
+    This function will:
+    1. Find all weather files matching the pattern
+    2. Load and combine data from all files
+    3. Find unique cities
+    4. Extract temperature data (from avg_temp or temperature column)
+    5. Create visualizations of the temperature data
+
+    Args:
+        output_dir (str): Save the charts here instead of showing them
+            (headless, no display needed)
+        fmt (str): "png" or "svg" when saving
+        per_city (bool): Also save a downsampled temperature chart per city
+        workers (int): Processes used for loading and per-city charts
+        data (DataFrame): Chart this instead of the weather files, e.g. a
+            data.query.query() result with date, city and temperature columns
+    """
+    
+    combined_df = data if data is not None else load_weather_data(workers=workers)
+
+    # Check if we have any data to work with
+    if combined_df is None or combined_df.empty:
+        print("❌ No weather files found!")
+        print(f"Looking for CSV files matching pattern: weather*.csv in {GROUP_DIR}")
+        return
+
+    city_column = 'city'
+    temp_column = 'temperature'
+
+    # One grouped pass feeds both charts
+    stats = aggregate_by_city(combined_df, city_column, temp_column)
+    for i, city in enumerate(stats.index, 1):
+        print(f"   {i}. {city}")
+
+    if output_dir is None:
+        # Set up the plot style
+        plt.style.use('default')
+        draw_summary_charts(plt.figure(figsize=(12, 10)), stats)
+
+        # Show the plots
+        plt.show()
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    fig = Figure(figsize=(12, 10))
+    draw_summary_charts(fig, stats)
+    summary_path = os.path.join(output_dir, f"temperature_summary.{fmt}")
+    fig.savefig(summary_path)
+    print(f"🖼️  Saved {summary_path}")
+
+    if per_city:
+        start = time.perf_counter()
+        paths = render_city_charts(combined_df, output_dir, fmt, workers=workers)
+        print(f"🖼️  Saved {len(paths)} city charts to {output_dir} in {time.perf_counter() - start:.2f}s")
 
 
 if __name__ == "__main__":
-    analyze_weather_files()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Chart temperatures from the group weather CSVs.")
+    parser.add_argument("--output", help="save charts to this folder instead of showing them")
+    parser.add_argument("--format", choices=["png", "svg"], default="png")
+    parser.add_argument("--per-city", action="store_true", help="also save one chart per city")
+    parser.add_argument("--workers", type=int, help="number of processes")
+    args = parser.parse_args()
+    analyze_weather_files(args.output, args.format, args.per_city, args.workers)
@@ -0,0 +1,136 @@
+import os
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from data import client
+from features.forecast import get_weather_icon_url, KNOWN_ICON_CODES
+
+# Pillow is optional - without it only the raw PNG store is available
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+ICON_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "icons")
+
+# Icon sizes the dashboard displays (current weather, forecast cards)
+DEFAULT_ICON_SIZES = ((80, 80), (40, 40))
+
+
+class IconCache:
+    """Two-level weather icon cache.
+
+    Raw PNGs are kept on disk (and in memory) keyed by icon code, and decoded,
+    resized PIL images are kept in memory keyed by (icon_code, size). Turning
+    an image into a Tk PhotoImage is left to the GUI because Tk objects must
+    be created on the main thread.
+    """
+
+    def __init__(self, icon_dir=ICON_DIR):
+        self.icon_dir = icon_dir
+        self._png = {}      # icon_code -> PNG bytes
+        self._images = {}   # (icon_code, size) -> resized PIL image
+        self._lock = threading.Lock()
+        self._code_locks = {}  # icon_code -> lock held while that icon is read or downloaded
+        self._prefetch_thread = None
+        self._pool = ThreadPoolExecutor(max_workers=6, thread_name_prefix="icon-loader")
+
+    def _icon_path(self, icon_code):
+        return os.path.join(self.icon_dir, f"{icon_code}.png")
+
+    def get_png(self, icon_code):
+        """Return the raw PNG bytes for an icon, downloading it only once."""
+        png = self._png.get(icon_code)
+        if png is not None:
+            return png
+
+        with self._lock:
+            code_lock = self._code_locks.setdefault(icon_code, threading.Lock())
+        with code_lock:  # prefetch() and load_many() may ask for the same icon at once
+            png = self._png.get(icon_code)
+            if png is not None:
+                return png
+
+            path = self._icon_path(icon_code)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    png = f.read()
+            else:
+                response = client.get(get_weather_icon_url(icon_code), timeout=5)
+                response.raise_for_status()
+                png = response.content
+
+                os.makedirs(self.icon_dir, exist_ok=True)
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(png)
+                os.replace(tmp_path, path)
+
+            with self._lock:
+                self._png[icon_code] = png
+        return png
+
+    def peek_image(self, icon_code, size):
+        """Return the resized image if it is already decoded, without any I/O."""
+        return self._images.get((icon_code, tuple(size)))
+
+    def get_image(self, icon_code, size):
+        """Return a decoded image resized to size, or None if Pillow is missing."""
+        if not PIL_AVAILABLE:
+            return None
+
+        key = (icon_code, tuple(size))
+        image = self._images.get(key)
+        if image is not None:
+            return image
+
+        image = Image.open(BytesIO(self.get_png(icon_code)))
+        image = image.convert("RGBA").resize(key[1], Image.Resampling.LANCZOS)
+        with self._lock:
+            self._images[key] = image
+        return image
+
+    def load_many(self, icon_codes, size):
+        """Download and decode several icons concurrently, waiting for all of them.
+
+        Returns a dict of icon_code -> image (or None if that icon failed).
+        """
+        def load(icon_code):
+            try:
+                return self.get_image(icon_code, size)
+            except Exception as e:
+                print(f"Could not load icon {icon_code}: {e}")
+                return None
+
+        icon_codes = list(dict.fromkeys(icon_codes))  # Drop duplicates, keep order
+        return dict(zip(icon_codes, self._pool.map(load, icon_codes)))
+
+    def prefetch(self, icon_codes=KNOWN_ICON_CODES, sizes=DEFAULT_ICON_SIZES):
+        """Download and decode every icon in a background thread."""
+        if self._prefetch_thread is not None and self._prefetch_thread.is_alive():
+            return self._prefetch_thread
+
+        def worker():
+            for icon_code in icon_codes:
+                try:
+                    if PIL_AVAILABLE:
+                        for size in sizes:
+                            self.get_image(icon_code, size)
+                    else:
+                        self.get_png(icon_code)
+                except requests.ConnectionError as e:
+                    # No point trying the rest while offline; icons load on demand later
+                    print(f"Stopping icon prefetch, network unavailable: {e}")
+                    return
+                except Exception as e:
+                    print(f"Could not prefetch icon {icon_code}: {e}")
+
+        self._prefetch_thread = threading.Thread(target=worker, name="icon-prefetch", daemon=True)
+        self._prefetch_thread.start()
+        return self._prefetch_thread
+
+
+# Shared cache used by the dashboard
+icon_cache = IconCache()
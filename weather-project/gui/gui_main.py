@@ -3,15 +3,16 @@ from tkinter import ttk, messagebox, simpledialog
 import datetime
 import json
 import os
-from data.data import fetch_current_weather, export_history_to_csv, export_filtered_history_to_csv
+from data.data import fetch_current_weather, save_weather_to_history, export_history, history_writer, city_index
+from data.exporters import available_formats
 from features.theme import ThemeSelector
 from features.forecast import get_forecast, get_local_weather_emoji
+from features.icons import icon_cache
+from gui.tasks import BackgroundTasks
 
 # Optional imports for image handling
 try:
-    from PIL import Image, ImageTk
-    import requests
-    from io import BytesIO
+    from PIL import ImageTk
     IMAGES_AVAILABLE = True
 except ImportError:
     IMAGES_AVAILABLE = False
@@ -26,6 +27,18 @@ class WeatherDashboard:
         self.latest_weather_data = None
         self.current_temp_f = None
 
+        # Tk images built from the icon cache, keyed by (icon_code, size)
+        self.icon_photos = {}
+        icon_cache.prefetch()
+
+        # City suggestions come from the saved history; load it without delaying the window
+        city_index.build_in_background()
+        self._filling_city = False  # Set while a chosen suggestion is written into the entry
+
+        # Network calls run on worker threads so the window never freezes
+        self.tasks = BackgroundTasks(self.root, max_workers=4, max_in_flight=8,
+                                     on_busy_change=self.set_loading)
+
         # Expanded theme configuration with more options
         self.themes = {
             "flatly": {  # Sky Blue theme - Much more blue like the sky
@@ -194,9 +207,21 @@ class WeatherDashboard:
         input_frame.pack(pady=10)
 
         tk.Label(input_frame, text="City:", bg=self.bg_color, fg=self.text_color).grid(row=0, column=0, padx=5, sticky=tk.W)
-        self.city_entry = ttk.Entry(input_frame, width=20)
+        self.city_var = tk.StringVar()
+        self.city_entry = ttk.Entry(input_frame, width=20, textvariable=self.city_var)
         self.city_entry.grid(row=0, column=1, padx=5)
         self.city_entry.insert(0, "New York")
+        self.city_var.trace_add("write", self.on_city_changed)
+
+        # Type-ahead dropdown placed under the city entry while typing
+        self.suggestion_list = tk.Listbox(self.root, activestyle="none", exportselection=False)
+        self.suggestion_list.bind("<ButtonRelease-1>", self.choose_suggestion)
+        self.suggestion_list.bind("<Return>", self.choose_suggestion)
+        self.suggestion_list.bind("<Escape>", self.hide_suggestions)
+        self.suggestion_list.bind("<FocusOut>", self.on_suggestions_focus_out)
+        self.city_entry.bind("<Down>", self.focus_suggestions)
+        self.city_entry.bind("<Escape>", self.hide_suggestions)
+        self.city_entry.bind("<FocusOut>", self.on_suggestions_focus_out)
 
         tk.Label(input_frame, text="Unit:", bg=self.bg_color, fg=self.text_color).grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
         self.temp_unit = tk.StringVar(value="F")
@@ -208,7 +233,7 @@ class WeatherDashboard:
         button_frame = tk.Frame(parent, bg=self.bg_color)
         button_frame.pack(pady=5)
 
-        update_btn = tk.Button(button_frame, text="Update", command=self.update_display,
+        update_btn = tk.Button(button_frame, text="Update", command=self.load_city,
                                bg=self.fg_color, fg="white", activebackground=self.fg_color)
         update_btn.pack(side=tk.LEFT, padx=5)
 
@@ -230,6 +255,11 @@ class WeatherDashboard:
                            bg=self.fg_color, fg="white", activebackground=self.fg_color)
         csv_btn.pack(side=tk.LEFT, padx=5)
 
+        # Loading indicator shown while requests are in flight
+        self.status_label = tk.Label(parent, text="", bg=self.bg_color, fg=self.text_color,
+                                     font=('Arial', 10, 'italic'))
+        self.status_label.pack()
+
         # Current weather display
         result_frame = tk.Frame(parent, bg=self.bg_color)
         result_frame.pack(pady=15, fill=tk.X)
@@ -267,24 +297,99 @@ class WeatherDashboard:
         self.condition_label.pack(anchor="w", pady=2)
 
     def load_weather_icon(self, icon_code, size=(60, 60)):
-        """Load weather icon from OpenWeatherMap or return emoji as fallback"""
+        """Load weather icon from the icon cache or return None to use the emoji fallback.
+
+        Never downloads anything - workers call preload_icons() first so the
+        image is already decoded by the time this runs on the UI thread.
+        """
         if not IMAGES_AVAILABLE:
             return None
             
+        key = (icon_code, tuple(size))
+        if key in self.icon_photos:
+            return self.icon_photos[key]
+
         try:
-            from features.forecast import get_weather_icon_url
-            icon_url = get_weather_icon_url(icon_code)
-            response = requests.get(icon_url, timeout=5)
-            if response.status_code == 200:
-                image = Image.open(BytesIO(response.content))
-                image = image.resize(size, Image.Resampling.LANCZOS)
-                return ImageTk.PhotoImage(image)
+            image = icon_cache.peek_image(icon_code, size)
+            if image is not None:
+                self.icon_photos[key] = ImageTk.PhotoImage(image)
+                return self.icon_photos[key]
         except Exception as e:
             print(f"Could not load icon {icon_code}: {e}")
         
         # Fallback: return None and we'll use emoji
         return None
 
+    @staticmethod
+    def preload_icons(icon_codes, size):
+        """Download and decode icons into the icon cache (runs on a worker thread)."""
+        if IMAGES_AVAILABLE:
+            icon_cache.load_many(icon_codes, size)
+
+    def set_loading(self, busy):
+        """Show or hide the loading indicator."""
+        self.status_label.config(text="Loading..." if busy else "")
+
+    def on_city_changed(self, *args):
+        """Typing a new city cancels lookups still running for the old one."""
+        self.tasks.cancel("weather")
+        self.tasks.cancel("forecast")
+        self.update_suggestions()
+
+    def update_suggestions(self):
+        """Show known cities starting with what has been typed (runs on every keystroke)."""
+        if self._filling_city or self.root.focus_get() is not self.city_entry:
+            self.hide_suggestions()
+            return
+
+        text = self.city_var.get().strip()
+        matches = city_index.complete(text, limit=8)
+        if not matches or (len(matches) == 1 and matches[0].casefold() == text.casefold()):
+            self.hide_suggestions()
+            return
+
+        self.suggestion_list.delete(0, tk.END)
+        self.suggestion_list.insert(tk.END, *matches)
+        self.suggestion_list.configure(height=len(matches))
+        self.suggestion_list.place(in_=self.city_entry, x=0, rely=1.0, relwidth=1.0)
+        self.suggestion_list.lift()
+
+    def hide_suggestions(self, event=None):
+        self.suggestion_list.place_forget()
+
+    def focus_suggestions(self, event=None):
+        """Move from the entry into the dropdown with the Down key."""
+        if not self.suggestion_list.winfo_ismapped():
+            return None
+        self.suggestion_list.focus_set()
+        self.suggestion_list.selection_clear(0, tk.END)
+        self.suggestion_list.selection_set(0)
+        self.suggestion_list.activate(0)
+        return "break"
+
+    def on_suggestions_focus_out(self, event=None):
+        # Focus moves between the entry and the dropdown; only hide once it leaves both
+        def hide_if_unfocused():
+            if self.root.focus_get() not in (self.city_entry, self.suggestion_list):
+                self.hide_suggestions()
+        self.root.after(100, hide_if_unfocused)
+
+    def choose_suggestion(self, event=None):
+        """Put the chosen suggestion in the entry and look it up."""
+        selection = self.suggestion_list.curselection()
+        if not selection:
+            return
+        city = self.suggestion_list.get(selection[0])
+        self._filling_city = True
+        try:
+            self.city_var.set(city)
+        finally:
+            self._filling_city = False
+        self.hide_suggestions()
+        self.city_entry.focus_set()
+        self.city_entry.icursor(tk.END)
+        self.load_city()
+
     def update_current_weather_icon(self, icon_code):
         """Update the current weather icon display"""
         # Clear existing icon
@@ -311,177 +416,179 @@ class WeatherDashboard:
             messagebox.showerror("Error", "Please enter a city name first.")
             return
 
-        try:
-            print(f"Fetching forecast for: {city}")  # Debug print
-            forecast_data = get_forecast(city)
-            print(f"Forecast data received: {len(forecast_data)} days")  # Debug print
-            
-            # Hide old forecast if exists
-            if self.forecast_frame:
-                self.forecast_frame.destroy()
-
-            self.forecast_frame = tk.Frame(self.scrollable_frame, bg=self.bg_color)
-            self.forecast_frame.pack(pady=10, fill=tk.X, padx=20)
-
-            # Title
-            title_label = tk.Label(self.forecast_frame, text="5-Day Forecast", font=('Arial', 14, 'bold'),
-                    bg=self.bg_color, fg=self.fg_color)
-            title_label.pack(pady=(0, 10))
-
-            # Check if we have forecast data
-            if not forecast_data:
-                tk.Label(self.forecast_frame, text="No forecast data available", 
-                        bg=self.bg_color, fg=self.text_color).pack()
-                return
+        print(f"Fetching forecast for: {city}")  # Debug print
+        self.tasks.submit("forecast", self.fetch_forecast, city,
+                          on_success=self.render_forecast, on_error=self.show_forecast_error)
 
-            # Create a simple horizontal container instead of canvas for now
-            forecast_container = tk.Frame(self.forecast_frame, bg=self.bg_color)
-            forecast_container.pack(fill=tk.X, pady=5)
+    def fetch_forecast(self, city):
+        """Fetch the forecast and its icons (runs on a worker thread)."""
+        forecast_data = get_forecast(city)
+        self.preload_icons([day.icon for day in forecast_data.values()], (40, 40))
+        return forecast_data
 
-            # Create forecast cards - limit to first 5 days and skip today if it's partial
-            forecast_items = list(forecast_data.items())
-            today = datetime.datetime.now().strftime('%Y-%m-%d')
-            
-            # Skip today's forecast if it's incomplete (start from tomorrow)
-            start_index = 1 if forecast_items and forecast_items[0][0] == today else 0
-            forecast_items = forecast_items[start_index:start_index+5]
-            
-            print(f"Creating {len(forecast_items)} forecast cards")  # Debug print
-            
-            for i, (date, data) in enumerate(forecast_items):
-                print(f"Creating card for {date}: {data['description']}")  # Debug print
-                
-                # Create forecast card with fixed size
-                forecast_card = tk.Frame(forecast_container, bg=self.text_color, relief=tk.RAISED, bd=2)
-                forecast_card.pack(side=tk.LEFT, padx=8, pady=5, fill=tk.Y)
-                
-                # Inner frame with theme colors
-                inner_frame = tk.Frame(forecast_card, bg=self.bg_color, padx=8, pady=8)
-                inner_frame.pack(fill=tk.BOTH, expand=True)
+    def render_forecast(self, forecast_data):
+        """Draw the forecast cards (runs on the UI thread)."""
+        print(f"Forecast data received: {len(forecast_data)} days")  # Debug print
 
-                # Weather icon or emoji
-                icon_photo = self.load_weather_icon(data['icon'], size=(40, 40))
-                
-                if icon_photo:
-                    icon_label = tk.Label(inner_frame, image=icon_photo, bg=self.bg_color)
-                    icon_label.image = icon_photo  # Keep a reference
-                    icon_label.pack(pady=(0, 5))
-                else:
-                    emoji = get_local_weather_emoji(data['icon'])
-                    emoji_label = tk.Label(inner_frame, text=emoji, font=('Arial', 24), bg=self.bg_color)
-                    emoji_label.pack(pady=(0, 5))
+        # Hide old forecast if exists
+        if self.forecast_frame:
+            self.forecast_frame.destroy()
 
-                # Temperature conversion
-                unit = self.temp_unit.get()
-                high_temp = data['high'] if unit == "F" else (data['high'] - 32) * 5 / 9
-                low_temp = data['low'] if unit == "F" else (data['low'] - 32) * 5 / 9
+        self.forecast_frame = tk.Frame(self.scrollable_frame, bg=self.bg_color)
+        self.forecast_frame.pack(pady=10, fill=tk.X, padx=20)
 
-                # Format date nicely
-                try:
-                    date_obj = datetime.datetime.strptime(date, '%Y-%m-%d')
-                    formatted_date = date_obj.strftime('%a\n%b %d')
-                except Exception as e:
-                    print(f"Date formatting error: {e}")
-                    formatted_date = date
-
-                # Date
-                date_label = tk.Label(inner_frame, text=formatted_date, 
-                                    bg=self.bg_color, fg=self.text_color, 
-                                    font=('Arial', 9, 'bold'), justify=tk.CENTER)
-                date_label.pack(pady=(0, 3))
-
-                # Condition (shortened)
-                condition_text = data['description'].title()
-                if len(condition_text) > 15:
-                    condition_text = condition_text[:12] + "..."
-                    
-                condition_label = tk.Label(inner_frame, text=condition_text, 
-                                         bg=self.bg_color, fg=self.text_color, 
-                                         font=('Arial', 7), justify=tk.CENTER)
-                condition_label.pack(pady=(0, 3))
-
-                # Temperature
-                temp_label = tk.Label(inner_frame, 
-                                    text=f"H: {high_temp:.0f}°\nL: {low_temp:.0f}°", 
-                                    bg=self.bg_color, fg=self.text_color, 
-                                    font=('Arial', 8), justify=tk.CENTER)
-                temp_label.pack()
-
-            print("Forecast display completed")  # Debug print
-            
-            # Force update of the scrollable region
-            self.scrollable_frame.update_idletasks()
-            self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        # Title
+        title_label = tk.Label(self.forecast_frame, text="5-Day Forecast", font=('Arial', 14, 'bold'),
+                bg=self.bg_color, fg=self.fg_color)
+        title_label.pack(pady=(0, 10))
 
-        except ValueError as ve:
-            print(f"ValueError in forecast: {ve}")
-            messagebox.showerror("Invalid City", f"Forecast error: {str(ve)}")
-        except Exception as e:
-            print(f"Exception in forecast: {e}")
-            messagebox.showerror("Error", f"Unable to fetch forecast data: {str(e)}")
-            import traceback
-            traceback.print_exc()  # Print full stack trace for debugging
+        # Check if we have forecast data
+        if not forecast_data:
+            tk.Label(self.forecast_frame, text="No forecast data available", 
+                    bg=self.bg_color, fg=self.text_color).pack()
+            return
 
-    def save_weather_to_history(self, city, data):
-        """Save weather data to history cache with current date"""
-        import json
-        import os
-        from datetime import datetime
+        # Create a simple horizontal container instead of canvas for now
+        forecast_container = tk.Frame(self.forecast_frame, bg=self.bg_color)
+        forecast_container.pack(fill=tk.X, pady=5)
+
+        # Create forecast cards - limit to first 5 days and skip today if it's partial
+        forecast_items = list(forecast_data.items())
+        today = datetime.datetime.now().strftime('%Y-%m-%d')
         
-        current_date = datetime.now().strftime('%Y-%m-%d')
+        # Skip today's forecast if it's incomplete (start from tomorrow)
+        start_index = 1 if forecast_items and forecast_items[0][0] == today else 0
+        forecast_items = forecast_items[start_index:start_index+5]
         
-        # Use the same path as data.py - relative to the data.py file location
-        try:
-            # Import the historyFile path directly from data.py
-            from data.data import historyFile
+        print(f"Creating {len(forecast_items)} forecast cards")  # Debug print
+        
+        for i, (date, data) in enumerate(forecast_items):
+            print(f"Creating card for {date}: {data.description}")  # Debug print
             
-            # Create the directory if it doesn't exist
-            os.makedirs(os.path.dirname(historyFile), exist_ok=True)
+            # Create forecast card with fixed size
+            forecast_card = tk.Frame(forecast_container, bg=self.text_color, relief=tk.RAISED, bd=2)
+            forecast_card.pack(side=tk.LEFT, padx=8, pady=5, fill=tk.Y)
             
-            entry = {
-                "city": city,
-                "date": current_date,
-                "data": data
-            }
+            # Inner frame with theme colors
+            inner_frame = tk.Frame(forecast_card, bg=self.bg_color, padx=8, pady=8)
+            inner_frame.pack(fill=tk.BOTH, expand=True)
+
+            # Weather icon or emoji
+            icon_photo = self.load_weather_icon(data.icon, size=(40, 40))
             
-            with open(historyFile, "a") as f:
-                f.write(json.dumps(entry) + "\n")
-                
-            print(f"Weather data saved for {city} on {current_date} to {historyFile}")
-        except Exception as e:
-            print(f"Error saving weather data to history: {e}")
-            # Fallback: try to save in data directory
+            if icon_photo:
+                icon_label = tk.Label(inner_frame, image=icon_photo, bg=self.bg_color)
+                icon_label.image = icon_photo  # Keep a reference
+                icon_label.pack(pady=(0, 5))
+            else:
+                emoji = get_local_weather_emoji(data.icon)
+                emoji_label = tk.Label(inner_frame, text=emoji, font=('Arial', 24), bg=self.bg_color)
+                emoji_label.pack(pady=(0, 5))
+
+            # Temperature conversion
+            unit = self.temp_unit.get()
+            high_temp = data.high if unit == "F" else (data.high - 32) * 5 / 9
+            low_temp = data.low if unit == "F" else (data.low - 32) * 5 / 9
+
+            # Format date nicely
             try:
-                fallback_path = os.path.join("data", "weather_history.txt")
-                os.makedirs(os.path.dirname(fallback_path), exist_ok=True)
-                
-                entry = {
-                    "city": city,
-                    "date": current_date,
-                    "data": data
-                }
+                date_obj = datetime.datetime.strptime(date, '%Y-%m-%d')
+                formatted_date = date_obj.strftime('%a\n%b %d')
+            except Exception as e:
+                print(f"Date formatting error: {e}")
+                formatted_date = date
+
+            # Date
+            date_label = tk.Label(inner_frame, text=formatted_date, 
+                                bg=self.bg_color, fg=self.text_color, 
+                                font=('Arial', 9, 'bold'), justify=tk.CENTER)
+            date_label.pack(pady=(0, 3))
+
+            # Condition (shortened)
+            condition_text = data.description.title()
+            if len(condition_text) > 15:
+                condition_text = condition_text[:12] + "..."
                 
-                with open(fallback_path, "a") as f:
-                    f.write(json.dumps(entry) + "\n")
-                    
-                print(f"Weather data saved for {city} on {current_date} to fallback path {fallback_path}")
-            except Exception as fallback_error:
-                print(f"Error saving to fallback path: {fallback_error}")
+            condition_label = tk.Label(inner_frame, text=condition_text, 
+                                     bg=self.bg_color, fg=self.text_color, 
+                                     font=('Arial', 7), justify=tk.CENTER)
+            condition_label.pack(pady=(0, 3))
+
+            # Temperature
+            temp_label = tk.Label(inner_frame, 
+                                text=f"H: {high_temp:.0f}°\nL: {low_temp:.0f}°", 
+                                bg=self.bg_color, fg=self.text_color, 
+                                font=('Arial', 8), justify=tk.CENTER)
+            temp_label.pack()
+
+        print("Forecast display completed")  # Debug print
+        
+        # Force update of the scrollable region
+        self.scrollable_frame.update_idletasks()
+        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+
+
+    def show_forecast_error(self, error, quiet=False):
+        if quiet:
+            print(f"Forecast unavailable: {error}")
+        elif isinstance(error, ValueError):
+            print(f"ValueError in forecast: {error}")
+            messagebox.showerror("Invalid City", f"Forecast error: {str(error)}")
+        else:
+            print(f"Exception in forecast: {error}")
+            messagebox.showerror("Error", f"Unable to fetch forecast data: {str(error)}")
+            import traceback
+            # Full stack trace for debugging (three-argument form works before Python 3.10 too)
+            traceback.print_exception(type(error), error, error.__traceback__)
+
+    def save_weather_to_history(self, city, data):
+        """Save weather data to history cache with current date"""
+        save_weather_to_history(city, data)
+
+    def load_city(self):
+        """Fetch current weather and the forecast for a city at the same time.
+
+        Both requests (and their icon downloads) run concurrently, and each
+        panel is drawn as soon as its own data arrives.
+        """
+        city = self.city_entry.get().strip()
+
+        if not city:
+            messagebox.showerror("Error", "City name cannot be empty.")
+            return
+
+        self.tasks.submit("weather", self.fetch_weather, city, (80, 80),
+                          on_success=self.render_current_weather, on_error=self.show_weather_error)
+        # The weather panel already reports a bad city, so forecast errors are only logged
+        self.tasks.submit("forecast", self.fetch_forecast, city,
+                          on_success=self.render_forecast,
+                          on_error=lambda error: self.show_forecast_error(error, quiet=True))
 
     def update_display(self):
         city = self.city_entry.get().strip()
-        unit = self.temp_unit.get()
 
         if not city:
             messagebox.showerror("Error", "City name cannot be empty.")
             return
 
-        try:
-            data = fetch_current_weather(city)
+        self.tasks.submit("weather", self.fetch_weather, city, (80, 80),
+                          on_success=self.render_current_weather, on_error=self.show_weather_error)
 
-            # Save to history cache automatically
-            self.save_weather_to_history(city, data)
+    def fetch_weather(self, city, icon_size):
+        """Fetch current weather, save it and warm its icon (runs on a worker thread)."""
+        data = fetch_current_weather(city)
 
+        # Save to history cache automatically
+        self.save_weather_to_history(city, data)
+
+        self.preload_icons([data['weather'][0]['icon']], icon_size)
+        return data
+
+    def render_current_weather(self, data):
+        """Show fetched weather data (runs on the UI thread)."""
+        unit = self.temp_unit.get()
+
+        try:
             self.latest_weather_data = data
             temp = data['main']['temp']
             self.current_temp_f = temp
@@ -512,21 +619,25 @@ class WeatherDashboard:
                     bg=self.fg_color, fg="white", activebackground=self.fg_color)
                 self.compare_button.pack(pady=5)
 
-        except ValueError as ve:
-            messagebox.showerror("Invalid City", str(ve))
         except Exception as e:
-            print(f"Unhandled error: {e}")
+            self.show_weather_error(e)
+
+    def show_weather_error(self, error):
+        if isinstance(error, ValueError):
+            messagebox.showerror("Invalid City", str(error))
+        else:
+            print(f"Unhandled error: {error}")
             messagebox.showerror("Error", "An unexpected error occurred while fetching weather data.")
 
     def export_csv_dialog(self):
         """Show dialog for CSV export options"""
         export_window = tk.Toplevel(self.root)
         export_window.title("Export Weather Data")
-        export_window.geometry("400x300")
+        export_window.geometry("400x340")
         export_window.configure(bg=self.bg_color)
 
         # Title
-        tk.Label(export_window, text="Export Weather History to CSV", 
+        tk.Label(export_window, text="Export Weather History", 
                 font=('Arial', 14, 'bold'), bg=self.bg_color, fg=self.text_color).pack(pady=10)
 
         # Export options frame
@@ -544,6 +655,16 @@ class WeatherDashboard:
         tk.Radiobutton(unit_frame, text="Celsius", variable=temp_unit_var, value="C", 
                       bg=self.bg_color, fg=self.text_color, activebackground=self.bg_color).pack(side=tk.LEFT)
 
+        # File format selection
+        format_frame = tk.Frame(options_frame, bg=self.bg_color)
+        format_frame.pack(fill=tk.X, pady=5)
+        tk.Label(format_frame, text="Format:", bg=self.bg_color, fg=self.text_color).pack(side=tk.LEFT)
+
+        format_var = tk.StringVar(value="csv")
+        format_menu = ttk.Combobox(format_frame, textvariable=format_var, values=available_formats(),
+                                   state="readonly", width=10)
+        format_menu.pack(side=tk.LEFT, padx=10)
+
         # Filter options
         filter_frame = tk.Frame(options_frame, bg=self.bg_color)
         filter_frame.pack(fill=tk.X, pady=10)
@@ -560,40 +681,35 @@ class WeatherDashboard:
         button_frame = tk.Frame(export_window, bg=self.bg_color)
         button_frame.pack(pady=20)
 
-        def export_all():
-            try:
-                temp_unit = temp_unit_var.get()
-                csv_path = export_history_to_csv(temp_unit=temp_unit)
-                if csv_path:
-                    messagebox.showinfo("Export Complete", f"Weather data exported successfully to:\n{os.path.basename(csv_path)}")
-                    export_window.destroy()
+        def start_export(success_text, empty_text, error_text, city_filter=None, date_filter=None):
+            """Export on a worker thread so a big history doesn't freeze the window."""
+            def on_success(export_path):
+                if export_path:
+                    messagebox.showinfo("Export Complete", f"{success_text} exported successfully to:\n{os.path.basename(export_path)}")
+                    if export_window.winfo_exists():
+                        export_window.destroy()
                 else:
-                    messagebox.showwarning("No Data", "No weather history found to export.")
-            except Exception as e:
-                messagebox.showerror("Export Error", f"Failed to export data: {str(e)}")
+                    messagebox.showwarning("No Data", empty_text)
+
+            def on_error(error):
+                messagebox.showerror("Export Error", f"{error_text}: {str(error)}")
+
+            self.tasks.submit("export", export_history, format_var.get(), None, temp_unit_var.get(),
+                              city_filter, date_filter, on_success=on_success, on_error=on_error)
+
+        def export_all():
+            start_export("Weather data", "No weather history found to export.", "Failed to export data")
 
         def export_filtered():
-            try:
-                temp_unit = temp_unit_var.get()
-                city_filter = city_filter_entry.get().strip() or None
-                date_filter = date_filter_entry.get().strip() or None
-                
-                if not city_filter and not date_filter:
-                    messagebox.showwarning("No Filter", "Please enter at least one filter (city or date) or use 'Export All Data'.")
-                    return
-                
-                csv_path = export_filtered_history_to_csv(
-                    city_filter=city_filter, 
-                    date_filter=date_filter, 
-                    temp_unit=temp_unit
-                )
-                if csv_path:
-                    messagebox.showinfo("Export Complete", f"Filtered weather data exported successfully to:\n{os.path.basename(csv_path)}")
-                    export_window.destroy()
-                else:
-                    messagebox.showwarning("No Data", "No matching weather history found to export.")
-            except Exception as e:
-                messagebox.showerror("Export Error", f"Failed to export filtered data: {str(e)}")
+            city_filter = city_filter_entry.get().strip() or None
+            date_filter = date_filter_entry.get().strip() or None
+
+            if not city_filter and not date_filter:
+                messagebox.showwarning("No Filter", "Please enter at least one filter (city or date) or use 'Export All Data'.")
+                return
+
+            start_export("Filtered weather data", "No matching weather history found to export.",
+                         "Failed to export filtered data", city_filter, date_filter)
 
         tk.Button(button_frame, text="Export All Data", command=export_all,
                  bg=self.fg_color, fg="white", activebackground=self.fg_color).pack(side=tk.LEFT, padx=5)
@@ -654,12 +770,20 @@ class WeatherDashboard:
             messagebox.showerror("Same City", "Please enter a different city to compare.")
             return
 
+        self.tasks.submit("compare", self.fetch_comparison, second_city,
+                          on_success=self.render_comparison, on_error=self.show_compare_error)
+
+    def fetch_comparison(self, city):
+        """Fetch and save the comparison city's weather (runs on a worker thread)."""
+        data = fetch_current_weather(city)
+
+        # Save comparison city to history as well
+        self.save_weather_to_history(city, data)
+        return data
+
+    def render_comparison(self, data):
+        """Show the comparison city's weather (runs on the UI thread)."""
         try:
-            data = fetch_current_weather(second_city)
-            
-            # Save comparison city to history as well
-            self.save_weather_to_history(second_city, data)
-            
             temp = data['main']['temp']
             if self.temp_unit.get() == "C":
                 temp = (temp - 32) * 5 / 9
@@ -686,8 +810,11 @@ class WeatherDashboard:
             tk.Label(self.compare_frame, text=f"Conditions: {condition}", bg=self.bg_color, fg=self.text_color).pack()
 
         except Exception as e:
-            print(e)
-            messagebox.showerror("Error", "Unable to fetch data for the second city.")
+            self.show_compare_error(e)
+
+    def show_compare_error(self, error):
+        print(error)
+        messagebox.showerror("Error", "Unable to fetch data for the second city.")
 
     def apply_theme(self, theme):
         # Apply the theme and update colors
@@ -775,6 +902,8 @@ def main():
     root = tk.Tk()
     app = WeatherDashboard(root)
     root.mainloop()
+    app.tasks.shutdown()
+    history_writer.close()  # Write any lookups still queued before exiting
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,117 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BackgroundTasks:
+    """Run blocking work on a thread pool and deliver results on the Tk thread.
+
+    Every task is submitted under a key such as "weather" or "forecast".
+    Submitting a new task under a key that is still running supersedes the
+    old one: it is cancelled if it hasn't started, and its result is dropped
+    if it has. Results are handed back through a queue that the Tk main loop
+    drains with root.after, so callbacks can safely touch widgets.
+    """
+
+    def __init__(self, root, max_workers=4, max_in_flight=8, poll_ms=50, on_busy_change=None):
+        self.root = root
+        self.max_in_flight = max_in_flight
+        self.poll_ms = poll_ms
+        self.on_busy_change = on_busy_change
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="weather-worker")
+        self._results = queue.Queue()
+        self._tasks = {}        # key -> (generation, future, on_success, on_error)
+        self._generation = 0
+        self._polling = False
+        self._closed = False
+
+    def submit(self, key, func, *args, on_success=None, on_error=None):
+        """Run func(*args) off the UI thread.
+
+        Returns False (without running anything) when the in-flight cap is
+        reached or the task runner has been shut down.
+        """
+        if self._closed:
+            return False
+
+        was_busy = self.busy()
+        old_task = self._tasks.pop(key, None)
+        if old_task is not None:
+            old_task[1].cancel()
+        if len(self._tasks) >= self.max_in_flight:
+            print(f"Too many requests in flight, ignoring '{key}'")
+            if was_busy and not self._tasks:
+                self._notify_busy(False)
+            return False
+
+        self._generation += 1
+        generation = self._generation
+        future = self._executor.submit(func, *args)
+        self._tasks[key] = (generation, future, on_success, on_error)
+        future.add_done_callback(lambda f: self._results.put((key, generation, f)))
+
+        if not was_busy:
+            self._notify_busy(True)
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+        return True
+
+    def cancel(self, key):
+        """Drop the task running under key; its result will never be delivered."""
+        task = self._tasks.pop(key, None)
+        if task is None:
+            return
+        task[1].cancel()
+        if not self._tasks:
+            self._notify_busy(False)
+
+    def is_running(self, key):
+        return key in self._tasks
+
+    def busy(self):
+        return bool(self._tasks)
+
+    def shutdown(self):
+        """Cancel queued work and stop accepting new tasks."""
+        self._closed = True
+        self._tasks.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _notify_busy(self, busy):
+        if self.on_busy_change:
+            self.on_busy_change(busy)
+
+    def _poll(self):
+        """Deliver finished results on the Tk thread, then reschedule while busy."""
+        while True:
+            try:
+                key, generation, future = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            task = self._tasks.get(key)
+            if task is None or task[0] != generation or future.cancelled():
+                continue  # Superseded or cancelled - drop the stale result
+
+            del self._tasks[key]
+            if not self._tasks:
+                self._notify_busy(False)
+
+            _, _, on_success, on_error = task
+            error = future.exception()
+            try:
+                if error is None:
+                    if on_success:
+                        on_success(future.result())
+                elif on_error:
+                    on_error(error)
+                else:
+                    print(f"Background task '{key}' failed: {error}")
+            except Exception as e:
+                print(f"Error handling result of '{key}': {e}")
+
+        if self._tasks and not self._closed:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
@@ -0,0 +1,43 @@
+import os
+import sys
+import pytest
+
+# Tests import the app's packages the same way main.py does, from the project folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data import data
+from data.history_index import HistoryIndex
+from data.history_summary import HistorySummary
+from data.history_writer import HistoryWriter
+
+
+def make_record(city, date, ts=None, temp=50.0, name=None, city_id=None):
+    """A compact history record like records.compact_record() builds."""
+    return {"v": 2, "city": city, "date": date, "ts": ts, "id": city_id, "name": name or city,
+            "country": "US", "lat": 1.0, "lon": 2.0, "temp": temp, "humidity": 40,
+            "precip": 0.0, "condition": "Clear", "icon": "01d"}
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    """Point data.py's text history (and its sidecars and writer) at a temp folder."""
+    path = str(tmp_path / "weather_history.txt")
+    monkeypatch.setattr(data, "historyFile", path)
+    monkeypatch.setattr(data, "HISTORY_BACKEND", "jsonl")
+    monkeypatch.setattr(data, "HISTORY_INDEX", True)
+    monkeypatch.setattr(data, "HISTORY_FSYNC", "none")
+    monkeypatch.setattr(data, "HISTORY_MAX_BYTES", 1 << 30)
+    monkeypatch.setattr(data, "HISTORY_ROTATE_MONTHLY", False)
+    monkeypatch.setattr(data, "history_index", HistoryIndex(path))
+    monkeypatch.setattr(data, "history_summary", HistorySummary(path, segments=data.history_segment_paths))
+    writer = HistoryWriter(data._write_history_batch, flush_interval=0.05)
+    monkeypatch.setattr(data, "history_writer", writer)
+    yield path
+    writer.close()
+
+
+def save_records(records):
+    """Queue records through the history writer and wait until they are on disk."""
+    for record in records:
+        data.history_writer.submit(record)
+    data.flush_history()
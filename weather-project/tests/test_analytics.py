@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+from features.group.analytics import WeatherAnalytics, resample_by_city
+
+
+def _daily(start="2026-01-01", end="2026-03-10"):
+    dates = pd.date_range(start, end, freq="D")
+    return pd.DataFrame({"date": list(dates) * 2,
+                         "city": ["Goshen"] * len(dates) + ["Miami"] * len(dates),
+                         "temperature": np.arange(2 * len(dates), dtype=np.float64),
+                         "humidity": 50.0,
+                         "condition": "Sunny"})
+
+
+@pytest.mark.parametrize("period", ["week", "month"])
+def test_running_sums_and_resample_share_their_keys(period):
+    df = _daily()
+    analytics = WeatherAnalytics()
+    analytics.update(df)
+
+    incremental = analytics.resampled(period)
+    batch = resample_by_city(df, period)["temperature"]
+
+    assert incremental.index.equals(batch.index)
+    assert incremental.to_numpy() == pytest.approx(batch.to_numpy())
+
+
+def test_weeks_are_labelled_by_their_monday():
+    df = _daily("2026-01-01", "2026-01-11")  # Thursday to the next Sunday
+    weeks = resample_by_city(df, "week").loc["Goshen"].index
+
+    assert list(weeks) == [pd.Timestamp("2025-12-29"), pd.Timestamp("2026-01-05")]
+    assert all(day.dayofweek == 0 for day in weeks)
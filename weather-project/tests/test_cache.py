@@ -0,0 +1,49 @@
+import os
+import threading
+import time
+from data.cache import TTLCache, normalize_city
+
+
+def test_lru_eviction_and_stats():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)  # "b" is the least recently used
+
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.get("missing") is None
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 1
+
+
+def test_stale_entries_are_served_by_lookup_only():
+    cache = TTLCache(stale_ttl=60)
+    cache.set("a", 1, expires_at=time.time() - 1)
+
+    assert cache.get("a") is None
+    assert cache.lookup("a") == (1, False)
+    cache.set("b", 2, expires_at=time.time() - 120)
+    assert cache.lookup("b") == (None, False)
+
+
+def test_persisted_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = TTLCache(persist_path=path, serialize=list, deserialize=tuple)
+    cache.set(normalize_city(" New  York "), (1, 2))
+
+    assert TTLCache(persist_path=path, serialize=list, deserialize=tuple).get("new york") == (1, 2)
+
+
+def test_concurrent_sets_leave_a_complete_file(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = TTLCache(max_size=1000, persist_path=path)
+    threads = [threading.Thread(target=lambda n=n: [cache.set(f"{n}-{i}", i) for i in range(25)])
+               for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(TTLCache(max_size=1000, persist_path=path)) == 200
+    assert os.listdir(tmp_path) == ["cache.json"]  # No temp files left behind
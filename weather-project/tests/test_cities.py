@@ -0,0 +1,65 @@
+import random
+import string
+import time
+from data.cities import City, CityIndex, PrefixIndex, city_key
+from conftest import make_record
+
+
+def test_complete_returns_matches_in_key_order():
+    index = PrefixIndex()
+    index.update(["Paris, FR", "Parma, IT", "Oslo, NO", "paris, US"])
+    index.add("Paramaribo, SR")
+    index.add("Paris, FR")  # Already there: ignored
+
+    assert index.complete("par") == ["Paramaribo, SR", "Paris, FR", "paris, US", "Parma, IT"]
+    assert index.complete("PARIS") == ["Paris, FR", "paris, US"]
+    assert index.complete("paris, u") == ["paris, US"]
+    assert index.complete("x") == []
+    assert index.complete("  ") == []
+    assert len(index) == 5
+
+
+def test_complete_limit():
+    index = PrefixIndex()
+    index.update(f"Springfield {i:02d}" for i in range(30))
+
+    assert index.complete("spring", limit=5) == [f"Springfield {i:02d}" for i in range(5)]
+    assert len(index.complete("spring", limit=50)) == 30
+    assert index.complete("spring", limit=0) == []
+
+
+def test_complete_is_fast_with_many_names():
+    random.seed(0)
+    names = ["".join(random.choices(string.ascii_lowercase, k=8)) for _ in range(50000)]
+    index = PrefixIndex()
+    index.update(names)
+
+    start = time.perf_counter()
+    for name in names[:1000]:
+        index.complete(name[:3], limit=8)
+    assert (time.perf_counter() - start) / 1000 < 0.001
+
+
+def test_city_index_resolves_typed_names_and_skips_ambiguous_ones():
+    entries = [make_record("nyc", "2026-01-01", name="New York", city_id=5128581),
+               make_record("Springfield", "2026-01-01", name="Springfield", city_id=1),
+               make_record("springfield, mo", "2026-01-01", name="Springfield", city_id=2)]
+    index = CityIndex(entries=lambda: entries)
+
+    assert index.resolve("NYC").id == 5128581
+    assert index.resolve("new york, us").id == 5128581
+    assert index.resolve("springfield").id == 1  # Typed before: resolves as it did then
+    assert index.resolve("Springfield, US") is None  # Two known cities share it
+    assert index.complete("spr") == ["Springfield, US"]
+
+
+def test_learn_adds_new_cities_to_suggestions():
+    index = CityIndex(entries=lambda: [])
+    index.build_in_background().join()
+    index.learn("oslo", {"id": 3143244, "name": "Oslo", "coord": {"lat": 59.9, "lon": 10.7},
+                         "sys": {"country": "NO"}})
+
+    assert index.complete("os") == ["Oslo, NO"]
+    assert index.resolve("Oslo").query_params() == {"id": 3143244}
+    assert City(None, "Nowhere", lat=1.0, lon=2.0).query_params() == {"lat": 1.0, "lon": 2.0}
+    assert city_key(" Paris ,FR ") == city_key("paris, fr")
@@ -0,0 +1,81 @@
+import csv
+import gzip
+import io
+import json
+import pytest
+from data import data, exporters
+from conftest import make_record, save_records
+
+
+def _saved_history(count=60):
+    """Save `count` records, the first half into a closed segment."""
+    records = [make_record(f"City{i % 7}", f"2026-01-{i % 28 + 1:02d}", ts=1767600000 + i, temp=32.0 + i)
+               for i in range(count)]
+    save_records(records[:count // 2])
+    data.rotate_history()
+    save_records(records[count // 2:])
+    return records
+
+
+def _read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_parallel_export_matches_single_pass(history, tmp_path):
+    _saved_history()
+    single = data.export_history("csv", str(tmp_path / "single.csv"), city_filter="city3")
+    parallel = data.export_history_parallel(str(tmp_path / "parallel.csv"), city_filter="city3",
+                                            workers=3, chunk_size=512)
+
+    rows = _read_csv(parallel)
+    assert rows == _read_csv(single)
+    assert rows[0] == exporters.COLUMNS and len(rows) == 1 + 9
+
+
+def test_parallel_export_reads_the_sqlite_backend(history, tmp_path, monkeypatch):
+    monkeypatch.setattr(data, "HISTORY_BACKEND", "sqlite")
+    monkeypatch.setattr(data, "historyDbFile", str(tmp_path / "weather_history.db"))
+    monkeypatch.setattr(data, "_history_store", None)
+    save_records([make_record("Paris", "2026-01-05", temp=50.0), make_record("Rome", "2026-01-06", temp=59.0)])
+
+    path = data.export_history_parallel(str(tmp_path / "export.csv"), temp_unit="C", workers=2)
+
+    assert [row[:3] for row in _read_csv(path)[1:]] == [["Paris", "2026-01-05", "10.0"],
+                                                        ["Rome", "2026-01-06", "15.0"]]
+    data.get_history_store().close()
+
+
+def _read_export(path, fmt):
+    """Rows of an export as lists of strings, header first."""
+    if fmt == "parquet":
+        table = exporters.pq.read_table(path)
+        return [table.column_names] + [[str(value) for value in row.values()] for row in table.to_pylist()]
+    if fmt == "ndjson":
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        return [list(rows[0])] + [[str(value) for value in row.values()] for row in rows]
+    if fmt == "csv.gz":
+        with gzip.open(path, "rt", newline="", encoding="utf-8") as f:
+            return list(csv.reader(f))
+    if fmt == "csv.zst":
+        with open(path, "rb") as f:
+            text = exporters.zstandard.ZstdDecompressor().stream_reader(f).read().decode()
+        return list(csv.reader(io.StringIO(text)))
+    return _read_csv(path)
+
+
+@pytest.mark.parametrize("fmt", exporters.available_formats())
+def test_every_format_holds_the_same_rows(history, tmp_path, fmt):
+    _saved_history(count=20)
+    path = data.export_history(fmt, str(tmp_path / f"export{exporters.EXPORT_FORMATS[fmt]}"), temp_unit="C")
+
+    rows = _read_export(path, fmt)
+    assert rows[0] == exporters.COLUMNS
+    assert [row[0] for row in rows[1:]] == [f"City{i % 7}" for i in range(20)]
+    assert [float(row[2]) for row in rows[1:]] == pytest.approx([i * 5 / 9 for i in range(20)])
+
+
+def test_unknown_format_is_rejected(history, tmp_path):
+    with pytest.raises(ValueError):
+        data.export_history("xlsx", str(tmp_path / "export.xlsx"))
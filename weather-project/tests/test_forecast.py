@@ -0,0 +1,76 @@
+import calendar
+import time
+import pytest
+from data.cache import TTLCache
+from features import forecast as forecast_module
+from features.forecast import get_forecast, next_forecast_issue
+
+MIDNIGHT = calendar.timegm((2026, 1, 5, 0, 0, 0))
+
+
+class FakeResponse:
+    status_code = 200
+    ok = True
+
+    def __init__(self, temp):
+        self.temp = temp
+
+    def json(self):
+        return {"list": [{"dt": MIDNIGHT + i * 10800, "dt_txt": f"2026-01-05 {i * 3:02d}:00:00",
+                          "main": {"temp": self.temp + i, "humidity": 50},
+                          "weather": [{"description": "clear sky", "icon": "01d"}]} for i in range(3)]}
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """Count forecast requests and keep the cache in memory."""
+    calls = []
+
+    def get(url, params=None, **kwargs):
+        calls.append(params)
+        return FakeResponse(temp=40.0 + len(calls))
+
+    monkeypatch.setattr(forecast_module.client, "get", get)
+    monkeypatch.setattr(forecast_module, "forecast_cache", TTLCache(stale_ttl=3600))
+    monkeypatch.setattr(forecast_module, "resolve_city", lambda city: None)
+    monkeypatch.setattr(forecast_module, "learn_city", lambda city, data: None)
+    return calls
+
+
+def test_next_issue_follows_the_forecast_cycle():
+    assert next_forecast_issue(MIDNIGHT + 5 * 60) == MIDNIGHT + 10 * 60  # Before the delay: this cycle's issue
+    assert next_forecast_issue(MIDNIGHT + 10 * 60) == MIDNIGHT + 3 * 3600 + 10 * 60
+    assert next_forecast_issue(MIDNIGHT + 2 * 3600) == MIDNIGHT + 3 * 3600 + 10 * 60
+
+
+def test_forecast_is_cached_until_the_next_issue(api):
+    first = get_forecast("Paris")
+    again = get_forecast(" paris ")
+
+    assert again is first and len(api) == 1
+    expires_at = forecast_module.forecast_cache._entries["paris"][0]
+    assert expires_at == pytest.approx(next_forecast_issue())
+
+
+def test_stale_forecast_is_served_while_it_refreshes(api):
+    stale = get_forecast("Paris")
+    forecast_module.forecast_cache.set("paris", stale, expires_at=time.time() - 1)
+
+    assert get_forecast("Paris") is stale  # Straight away, without waiting for the request
+    for _ in range(100):
+        if not forecast_module._refreshing:
+            break
+        time.sleep(0.01)
+    fresh = get_forecast("Paris")
+
+    assert len(api) == 2
+    assert fresh is not stale and fresh["2026-01-05"].high == 44.0
+
+
+def test_keep_raw_always_fetches_and_caches_without_raw(api):
+    forecast = get_forecast("Paris", keep_raw=True)
+
+    assert forecast.raw is not None
+    assert get_forecast("Paris").raw is None
+    assert get_forecast("Paris", keep_raw=True).raw is not None
+    assert len(api) == 2
@@ -0,0 +1,19 @@
+import numpy as np
+from features.group.graph import downsample_lttb, downsample_minmax
+
+
+def test_downsamplers_keep_endpoints_and_peaks():
+    x = np.arange(10000, dtype=np.float64)
+    y = np.sin(x / 100.0)
+    y[5000] = 50.0
+
+    for downsample in (downsample_lttb, downsample_minmax):
+        dx, dy = downsample(x, y, 200)
+        assert len(dx) <= 200
+        assert dx[0] == x[0] and dx[-1] == x[-1]
+        assert dy.max() == 50.0
+        assert np.all(np.diff(dx) > 0)
+
+    # Short series are returned as they are
+    dx, dy = downsample_lttb(x[:50], y[:50], 200)
+    assert len(dx) == 50
@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+from matplotlib.cbook import boxplot_stats
+from features.group.graph import aggregate_by_city
+
+
+def test_aggregate_by_city_matches_matplotlib():
+    rng = np.random.default_rng(0)
+    cities = np.repeat(["Miami", "Goshen", "Oslo"], [50, 7, 200])
+    values = rng.normal(60, 15, len(cities))
+    values[3] = 200.0  # A flier
+    df = pd.DataFrame({"city": pd.Categorical(cities), "temperature": values})
+
+    stats = aggregate_by_city(df)
+
+    for city in ["Miami", "Goshen", "Oslo"]:
+        expected = boxplot_stats(values[cities == city])[0]
+        row = stats.loc[city]
+        assert row["count"] == (cities == city).sum()
+        for ours, theirs in [("mean", "mean"), ("median", "med"), ("q1", "q1"), ("q3", "q3"),
+                             ("whislo", "whislo"), ("whishi", "whishi")]:
+            assert np.isclose(row[ours], expected[theirs])
+        assert sorted(row["fliers"]) == sorted(expected["fliers"])
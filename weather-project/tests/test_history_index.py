@@ -0,0 +1,77 @@
+import json
+import threading
+from data.history_index import HistoryIndex
+
+
+def _append(path, cities, date="2026-01-01"):
+    """Append one line per city; returns (start, [(offset, city, date)])."""
+    lines = [(json.dumps({"city": city, "date": date}) + "\n").encode() for city in cities]
+    with open(path, "ab") as f:
+        start = f.tell()
+        f.write(b"".join(lines))
+    offsets = []
+    offset = start
+    for city, line in zip(cities, lines):
+        offsets.append((offset, city, date))
+        offset += len(line)
+    return start, offsets
+
+
+def test_record_appends_after_refresh_does_not_duplicate(tmp_path):
+    path = str(tmp_path / "history.txt")
+    index = HistoryIndex(path)
+    _append(path, ["Paris"])
+    index.refresh()
+
+    # The writer appended, but a reader refreshed from the tail before the writer recorded it
+    start, offsets = _append(path, ["Paris", "Rome"])
+    index.refresh()
+    index.record_appends(start, offsets)
+
+    found = index.lookup(city_filter="")
+    assert len(found) == len(set(found)) == 3
+    assert len(index.lookup(cities=["paris"])) == 2
+    # The sidecar on disk agrees with the in-memory index
+    assert HistoryIndex(path).lookup(city_filter="") == found
+
+
+def test_concurrent_appends_and_lookups(tmp_path):
+    path = str(tmp_path / "history.txt")
+    index = HistoryIndex(path)
+    index.rebuild()
+    errors = []
+    done = threading.Event()
+
+    def reader():
+        while not done.is_set():
+            try:
+                index.lookup(city_filter="c")
+            except Exception as e:
+                errors.append(e)
+
+    readers = [threading.Thread(target=reader) for _ in range(2)]
+    for thread in readers:
+        thread.start()
+    for i in range(500):
+        start, offsets = _append(path, [f"c{i % 20}"])
+        index.record_appends(start, offsets)
+    done.set()
+    for thread in readers:
+        thread.join()
+
+    found = index.lookup(city_filter="c")
+    assert errors == []
+    assert len(found) == len(set(found)) == 500
+    assert len(HistoryIndex(path).lookup(city_filter="c")) == 500
+
+
+def test_lookup_filters(tmp_path):
+    path = str(tmp_path / "history.txt")
+    _append(path, ["Paris", "Rome"], date="2026-01-01")
+    _append(path, ["Paris"], date="2026-02-01")
+    index = HistoryIndex(path)
+
+    assert len(index.lookup(city_filter="par")) == 2
+    assert len(index.lookup(date_filter="2026-01-01")) == 2
+    assert len(index.lookup(cities=["PARIS"], start="2026-01-15")) == 1
+    assert index.lookup(cities=[]) == []
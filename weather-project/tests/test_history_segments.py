@@ -0,0 +1,53 @@
+import os
+from data import data, history_segments
+from conftest import make_record, save_records
+
+
+def _cities_and_dates(records):
+    """(city, date) of HistoryRecords or of the saved record dicts."""
+    return [(record["city"], record["date"]) if isinstance(record, dict) else (record.city, record.date)
+            for record in records]
+
+
+def test_rotate_keeps_every_record(history):
+    january = [make_record(f"City{i}", "2026-01-05", ts=1767600000 + i * 7200) for i in range(5)]
+    february = [make_record("Paris", "2026-02-01", ts=1769900000)]
+    save_records(january)
+    segment_path = data.rotate_history()
+    save_records(february)
+
+    assert os.path.exists(segment_path)
+    assert [segment.path for segment in history_segments.list_segments(history)] == [segment_path]
+    records = list(data.read_history())
+    assert _cities_and_dates(records) == _cities_and_dates(january + february)
+    assert data.get_search_history_summary()["total_entries"] == 6
+    # Filters reach both the segment and the active file
+    assert len(list(data.read_history(city_filter="city"))) == 5
+    assert len(list(data.read_history(date_filter="2026-02-01"))) == 1
+
+
+def test_compact_keeps_last_snapshot_per_window(history):
+    base = 1767600000 - 1767600000 % 3600
+    records = [
+        make_record("Paris", "2026-01-05", ts=base + 60, temp=1.0),
+        make_record("paris", "2026-01-05", ts=base + 120, temp=2.0),  # Same hour: replaces the first
+        make_record("Paris", "2026-01-05", ts=base + 3600 + 60, temp=3.0),  # Next hour: kept
+        make_record("Rome", "2026-01-05", ts=base + 90, temp=4.0),
+    ]
+    save_records(records)
+    data.rotate_history()
+
+    removed = data.compact_history(window_minutes=60)
+
+    assert removed == 1
+    assert [record.temp for record in data.read_history()] == [2.0, 3.0, 4.0]
+    assert data.get_search_history_summary()["total_entries"] == 3
+
+
+def test_compact_without_repeats_keeps_everything(history):
+    records = [make_record(f"City{i}", "2026-01-05", ts=1767600000) for i in range(10)]
+    save_records(records)
+    data.rotate_history()
+
+    assert data.compact_history(window_minutes=60) == 0
+    assert _cities_and_dates(data.read_history()) == _cities_and_dates(records)
@@ -0,0 +1,49 @@
+import json
+import os
+from data.history_summary import HistorySummary
+from conftest import make_record
+
+
+def _write(path, records, mode="a"):
+    with open(path, mode + "b") as f:
+        start = f.tell()
+        f.write(b"".join((json.dumps(record) + "\n").encode() for record in records))
+    return start
+
+
+def test_incremental_update_matches_rebuild(tmp_path):
+    path = str(tmp_path / "history.txt")
+    first = [make_record("Goshen, Indiana", "2026-01-01", ts=1767300000)]
+    later = [make_record("goshen,  Indiana", "2026-01-02", ts=1767400000),
+             make_record("GOSHEN, INDIANA", "2026-01-03", ts=1767500000),
+             make_record("Paris", "2026-01-02")]
+    _write(path, first)
+    summary = HistorySummary(path)
+    summary.get()
+
+    start = _write(path, later[:2])
+    summary.record_appends(start, later[:2])
+    _write(path, later[2:])  # Written behind the summary's back: picked up from the tail
+    incremental = summary.get()
+
+    os.remove(summary.summary_path)
+    assert HistorySummary(path).get() == incremental
+
+    assert incremental["total_entries"] == 4
+    assert set(incremental["cities"]) == {"Goshen, Indiana", "Paris"}
+    goshen = incremental["cities"]["Goshen, Indiana"]
+    assert goshen["count"] == 3
+    assert goshen["first_seen"] < goshen["last_seen"]
+    assert "T" in goshen["first_seen"]  # A timestamp, not just the lookup date
+    assert incremental["cities"]["Paris"]["first_seen"] == "2026-01-02"  # No ts: the date
+
+
+def test_old_summary_format_is_rebuilt(tmp_path):
+    path = str(tmp_path / "history.txt")
+    _write(path, [make_record("Rome", "2026-01-01"), make_record("rome", "2026-01-02")])
+    size = os.path.getsize(path)
+    with open(path + ".summary.json", "w") as f:
+        json.dump({"size": size, "mtime": os.stat(path).st_mtime_ns, "total_entries": 2,
+                   "first_seen": None, "last_seen": None, "cities": {"Rome": {}, "rome": {}}, "dates": {}}, f)
+
+    assert list(HistorySummary(path).get()["cities"]) == ["Rome"]
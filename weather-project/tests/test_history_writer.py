@@ -0,0 +1,75 @@
+import threading
+import time
+from data.history_writer import HistoryWriter
+
+
+class Recorder:
+    def __init__(self, delay=0.0):
+        self.batches = []
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def __call__(self, batch):
+        time.sleep(self.delay)
+        with self.lock:
+            self.batches.append(list(batch))
+
+    @property
+    def written(self):
+        return [record for batch in self.batches for record in batch]
+
+
+def test_flush_waits_for_everything_submitted():
+    recorder = Recorder(delay=0.01)
+    writer = HistoryWriter(recorder, flush_interval=10, batch_size=1000)
+    for i in range(50):
+        writer.submit(i)
+    writer.flush()
+
+    assert recorder.written == list(range(50))
+    assert len(recorder.batches) == 1  # Queued records are written together
+    writer.close()
+
+
+def test_batch_size_and_interval_trigger_writes():
+    recorder = Recorder()
+    writer = HistoryWriter(recorder, flush_interval=0.05, batch_size=3)
+    for i in range(7):
+        writer.submit(i)
+    time.sleep(0.3)  # The last, partial batch goes out once the interval is up
+
+    assert recorder.written == list(range(7))
+    assert all(len(batch) <= 3 for batch in recorder.batches)
+    writer.close()
+
+
+def test_close_writes_pending_then_writes_synchronously():
+    recorder = Recorder(delay=0.01)
+    writer = HistoryWriter(recorder, flush_interval=10, batch_size=1000)
+    writer.submit("a")
+    writer.submit("b")
+    writer.close()
+    assert recorder.written == ["a", "b"]
+
+    writer.submit("late")  # After close the record is written straight away
+    assert recorder.written == ["a", "b", "late"]
+    writer.flush()  # No-op once closed
+    writer.close()  # Closing twice is fine
+
+
+def test_write_errors_do_not_stop_the_writer():
+    calls = []
+
+    def failing_then_ok(batch):
+        calls.append(list(batch))
+        if len(calls) == 1:
+            raise OSError("disk full")
+
+    writer = HistoryWriter(failing_then_ok, flush_interval=10)
+    writer.submit(1)
+    writer.flush()
+    writer.submit(2)
+    writer.flush()
+    writer.close()
+
+    assert calls == [[1], [2]]
@@ -0,0 +1,89 @@
+import functools
+import os
+import pytest
+import data.query as query_module
+from data.query import query, query_records
+from features.group import graph
+from conftest import make_record, save_records
+
+ARCHIVE_CSV = """date,city,temperature,humidity,condition
+2026-01-01,Goshen,30.5,60,Snow
+2026-01-02,Goshen,32.0,55,Cloudy
+2026-01-01,Miami,75.0,80,Sunny
+"""
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    """A tiny group CSV archive in a temp folder, read through the Parquet cache."""
+    directory = tmp_path / "group"
+    directory.mkdir()
+    (directory / "weather1.csv").write_text(ARCHIVE_CSV)
+    monkeypatch.setattr(query_module, "read_weather_data",
+                        functools.partial(graph.read_weather_data, directory=str(directory)))
+    return str(directory)
+
+
+@pytest.fixture
+def saved(history):
+    save_records([make_record("Goshen, Indiana", "2026-01-01", name="Goshen", temp=28.0),
+                  make_record("miami", "2026-01-03", name="Miami", temp=80.0)])
+
+
+def test_history_and_archive_in_one_table(archive, saved):
+    df = query()
+
+    assert list(df.columns) == ["source", "date", "city", "temperature", "humidity", "precip", "condition"]
+    assert df["source"].value_counts().to_dict() == {"archive": 3, "history": 2}
+    assert df.loc[df["source"] == "archive", "precip"].isna().all()
+
+    miami = query(cities=["MIAMI"], start="2026-01-01", end="2026-01-31")
+    assert sorted(miami["source"]) == ["archive", "history"]
+    assert len(query(start="2026-01-02")) == 2
+
+
+def test_city_filter_matches_the_returned_city(archive, saved):
+    typed = query(cities=["Goshen, Indiana"], sources=["history"])
+    assert list(typed["city"]) == ["Goshen, Indiana"]
+
+    # Every returned label can be fed back in as a filter
+    for city in query(sources=["history"])["city"]:
+        assert len(query(cities=[city], sources=["history"])) == 1
+    assert len(query(cities=["Goshen"], sources=["archive"])) == 2
+
+
+def test_empty_city_list_returns_empty_typed_frame(archive, saved):
+    df = query(cities=[])
+
+    assert len(df) == 0
+    assert df["date"].dtype.kind == "M"
+    assert graph.read_weather_data(cities=[], directory=archive).empty
+
+
+def test_archive_filters_use_the_city_key(archive):
+    df = graph.read_weather_data(cities=[" goshen "], columns=["date", "city", "temperature"], directory=archive)
+
+    assert list(df["city"]) == ["Goshen", "Goshen"]
+    assert list(df["temperature"]) == [30.5, 32.0]  # Original row order
+    assert os.path.exists(os.path.join(archive, graph.CACHE_FILE))
+
+
+def test_query_records_round_and_blank_missing_values(archive, saved):
+    records = list(query_records(query(cities=["goshen"], sources=["archive"])))
+
+    assert [record.temp for record in records] == [30.5, 32.0]
+    assert all(record.precip is None for record in records)
+
+
+def test_stale_cache_is_not_read_when_the_rewrite_fails(archive, monkeypatch):
+    graph.read_weather_data(directory=archive)  # Builds the cache
+    with open(os.path.join(archive, "weather1.csv"), "a") as f:
+        f.write("2026-01-03,Goshen,33.5,50,Sunny\n")
+
+    def fail(*args):
+        raise OSError("read-only folder")
+
+    monkeypatch.setattr(graph, "_write_cache", fail)
+    df = graph.read_weather_data(cities=["goshen"], columns=["date", "temperature"], directory=archive)
+
+    assert list(df["temperature"]) == [30.5, 32.0, 33.5]